@@ -1,31 +1,153 @@
+"""Club administration: add, import, sync, list and delete members.
+
+Without arguments an interactive menu is shown. Subcommands make every task
+scriptable:
+
+    python admin_commands.py add "Jane Doe" janedoe
+    python admin_commands.py import members.csv [--dry-run] [--no-sync]
+    python admin_commands.py sync [NAME ...]
+    python admin_commands.py list
+    python admin_commands.py delete "Jane Doe" --yes
+    python admin_commands.py search-index
+
+The import CSV needs 'name' and 'bgg_username' columns and may have a
+'password' column; members without one get their BGG username as initial
+password and are asked to change it at first login. With --json every step is
+reported as one JSON object per line on stdout. Subcommands read the admin
+password from ADMIN_CLI_PASSWORD when set, and prompt for it otherwise.
+"""
+import argparse
+import csv
+import json
 import os
 import sys
 import getpass
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from dotenv import load_dotenv
+from flask import current_app
+from sqlalchemy import func, insert, select
+from werkzeug.security import generate_password_hash
 from app import create_app
-from app.models import db, User
+from app.models import db, User, password_hash_method, votes
 from app.bgg import update_games_for_user
+from app.sync import run_sync
+from app.cache import bump_data_version
+from app.votes import clear_votes, recount_votes
+from app.search import rebuild_search_index
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = create_app()
-app.app_context().push()
 
-
-def verify_admin_auth():
+def verify_admin_auth(input_password=None):
     admin_password = os.getenv('ADMIN_PASSWORD')
     if not admin_password:
         print("Error: ADMIN_PASSWORD environment variable not set.")
         sys.exit(1)
-    input_password = getpass.getpass("Enter admin password: ").strip()
+    if input_password is None:
+        input_password = getpass.getpass("Enter admin password: ").strip()
     if input_password != admin_password:
         print("Error: Incorrect admin password.")
         sys.exit(1)
 
 
+class Reporter:
+    """Prints progress as text, or as one JSON object per line with --json."""
+
+    def __init__(self, json_lines=False):
+        self.json_lines = json_lines
+
+    def __call__(self, event, message, **fields):
+        if self.json_lines:
+            print(json.dumps({'event': event, **fields}), flush=True)
+        else:
+            print(message, flush=True)
+
+
+def find_user(name):
+    return User.query.filter(User.name.ilike(name)).first()
+
+
+def validate_new_users(rows):
+    """Return an error message per row that is incomplete or clashes with a member or an earlier row.
+
+    Names and BGG usernames are compared case-insensitively, as when adding a
+    single member.
+    """
+    taken_names = set(db.session.execute(select(func.lower(User.name))).scalars())
+    taken_bgg = set(db.session.execute(select(func.lower(User.bgg_username))).scalars())
+    errors = {}
+    for line, row in enumerate(rows, start=1):
+        name, bgg_username = row['name'], row['bgg_username']
+        if not name or not bgg_username:
+            errors[line] = "name and BGG username are required"
+        elif name.lower() in taken_names or bgg_username.lower() in taken_bgg:
+            errors[line] = f"a member named '{name}' or with BGG username '{bgg_username}' already exists"
+        else:
+            taken_names.add(name.lower())
+            taken_bgg.add(bgg_username.lower())
+    return errors
+
+
+def create_users(rows):
+    """Insert validated members in a single transaction and return their IDs.
+
+    Passwords default to the BGG username. Hashing is deliberately slow, so the
+    hashes are computed on a thread pool (hashlib releases the GIL) before the
+    one INSERT.
+    """
+    passwords = [row.get('password') or row['bgg_username'] for row in rows]
+    hash_password = partial(generate_password_hash, method=password_hash_method())
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+        hashes = list(pool.map(hash_password, passwords))
+    try:
+        db.session.execute(insert(User), [
+            {'name': row['name'], 'bgg_username': row['bgg_username'], 'password_hash': password_hash,
+             'must_reset_password': not row.get('password')}
+            for row, password_hash in zip(rows, hashes)
+        ])
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+    names = [row['name'] for row in rows]
+    return db.session.execute(select(User.id).where(User.name.in_(names))).scalars().all()
+
+
+def sync_members(user_ids, report):
+    """Sync the given members (all if None) through run_sync, reporting progress.
+
+    Collections are fetched in parallel and share the BGG client's rate
+    limiter and the deployment-wide sync lock. Returns False if the sync could
+    not run or any member failed.
+    """
+    def progress(phase, done, total):
+        # Text output only shows every tenth of a phase; JSON consumers get every step
+        if report.json_lines or done == total or done % max(total // 10, 1) == 0:
+            report('progress', f"  {phase}: {done}/{total}", phase=phase, done=done, total=total)
+
+    summary = run_sync(current_app._get_current_object(), user_ids=user_ids, progress=progress)
+    if summary is None:
+        report('error', "Error: Another sync is already running. Try again once it has finished.",
+               error='sync already running')
+        return False
+    for name, stats in sorted(summary['synced'].items()):
+        report('synced', f"Success: {name}: {stats['games']} games, {stats['linked']} added, {stats['unlinked']} removed.",
+               user=name, **stats)
+    for name, error in sorted(summary['failed'].items()):
+        report('sync_failed', f"Error: {name}: {error}", user=name, error=error)
+    details = summary['details']
+    report('summary', f"Game details: {details['stale']} stale, {details['fetched']} fetched, "
+                      f"{details['failed_batches']} failed batches. {len(summary['synced'])} synced, "
+                      f"{len(summary['failed'])} failed.",
+           synced=len(summary['synced']), failed=len(summary['failed']), deleted_games=summary['deleted_games'],
+           **details)
+    return not summary['failed']
+
+
 def add_user():
     name = input("Enter user's name: ").strip()
     if not name:
@@ -49,7 +171,7 @@ def add_user():
     password = bgg_username
 
     # Create new user instance
-    user = User(name=name, bgg_username=bgg_username)
+    user = User(name=name, bgg_username=bgg_username, must_reset_password=True)
     user.set_password(password)
 
     # Add user to the session
@@ -92,6 +214,7 @@ def edit_user():
 
     try:
         db.session.commit()
+        bump_data_version()  # Voter names are part of the cached games page
         print(f"Success: User '{user.name}' updated successfully.")
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -115,8 +238,10 @@ def delete_user():
         return
 
     try:
+        clear_votes(user.id)
         db.session.delete(user)
         db.session.commit()
+        bump_data_version()
         print(f"Success: User '{name}' has been deleted.")
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -154,23 +279,212 @@ def update_user_games():
 
 
 def update_all_club_games():
-    users = User.query.all()
-    if not users:
+    if not User.query.first():
         print("No users found.")
         return
 
     print("Updating games for all users in the club...")
+    sync_members(None, Reporter())
+
+
+def repair_vote_counts():
+    print("Recomputing vote counters from the votes table...")
+    try:
+        fixed = recount_votes()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logging.error(f"Error: Failed to recompute vote counters. Details: {e}")
+        return
+    if fixed:
+        bump_data_version()
+    print(f"Success: {fixed} game(s) had a wrong vote counter and were repaired.")
+
+
+def rebuild_search(report):
+    report('search_index', "Rebuilding the game search index...")
+    try:
+        built = rebuild_search_index()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        report('error', f"Error: Failed to rebuild the search index. Details: {e}", error=str(e))
+        return False
+    if built:
+        report('search_index', "Success: The search index is up to date.", built=True)
+    else:
+        report('search_index', "This database has no text index; search falls back to LIKE matching.", built=False)
+    return True
+
+
+def read_user_csv(path):
+    """Read name, bgg_username and optional password columns from a CSV file ('-' for stdin)."""
+    handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+    try:
+        reader = csv.DictReader(handle)
+        missing = {'name', 'bgg_username'} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"CSV is missing the column(s): {', '.join(sorted(missing))}")
+        return [
+            {key: (row.get(key) or '').strip() for key in ('name', 'bgg_username', 'password')}
+            for row in reader
+        ]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def import_users(rows, report, dry_run=False, sync=True):
+    """Validate, insert and sync a batch of new members; returns the exit status."""
+    errors = validate_new_users(rows)
+    for line, error in sorted(errors.items()):
+        report('invalid', f"Error: row {line}: {error}", row=line, error=error)
+    if errors:
+        report('aborted', "Nothing was imported; fix the rows above and try again.", invalid=len(errors))
+        return 1
+    if not rows:
+        report('summary', "No members to import.", added=0)
+        return 0
+
+    for row in rows:
+        report('user', f"{'Would add' if dry_run else 'Adding'} '{row['name']}' (BGG: {row['bgg_username']})",
+               name=row['name'], bgg_username=row['bgg_username'], dry_run=dry_run)
+    if dry_run:
+        report('summary', f"Dry run: {len(rows)} member(s) would be added.", added=0, dry_run=True)
+        return 0
+
+    try:
+        user_ids = create_users(rows)
+    except SQLAlchemyError as e:
+        report('error', f"Error: Failed to add members, nothing was imported. Details: {e}", error=str(e))
+        return 1
+    bump_data_version()
+    report('added', f"Success: {len(user_ids)} member(s) added.", added=len(user_ids))
+    if sync:
+        report('sync', "Fetching their games from BGG...", users=len(user_ids))
+        return 0 if sync_members(user_ids, report) else 1
+    return 0
+
+
+def cmd_add(args, report):
+    return import_users(
+        [{'name': args.name.strip(), 'bgg_username': args.bgg_username.strip(), 'password': None}],
+        report, dry_run=args.dry_run, sync=not args.no_sync
+    )
+
+
+def cmd_import(args, report):
+    try:
+        rows = read_user_csv(args.csv)
+    except (OSError, ValueError, csv.Error) as e:
+        report('error', f"Error: {e}", error=str(e))
+        return 1
+    return import_users(rows, report, dry_run=args.dry_run, sync=not args.no_sync)
+
+
+def cmd_sync(args, report):
+    user_ids = None
+    if args.names:
+        users = [(name, find_user(name)) for name in args.names]
+        unknown = [name for name, user in users if user is None]
+        if unknown:
+            report('error', f"Error: No user found with the name(s): {', '.join(unknown)}", unknown=unknown)
+            return 1
+        user_ids = [user.id for _, user in users]
+    if args.dry_run:
+        names = args.names or db.session.execute(select(User.name).order_by(User.name)).scalars().all()
+        report('summary', f"Dry run: would sync {len(names)} member(s): {', '.join(names)}", users=names, dry_run=True)
+        return 0
+    return 0 if sync_members(user_ids, report) else 1
+
+
+def cmd_list(args, report):
+    counts = dict(db.session.execute(select(votes.c.user_id, func.count()).group_by(votes.c.user_id)).all())
+    users = User.query.order_by(User.name.asc()).all()
     for user in users:
-        print(f"Updating games for user: {user.name} ({user.bgg_username})")
-        try:
-            update_games_for_user(user)
-            print(f"Success: Games for user '{user.name}' have been updated.")
-        except Exception as e:
-            logging.error(f"Error updating games for user '{user.name}': {e}")
-    print("All club games have been updated.")
+        report('user', f"- {user.name} (BGG Username: {user.bgg_username}, votes: {counts.get(user.id, 0)})",
+               name=user.name, bgg_username=user.bgg_username, votes=counts.get(user.id, 0))
+    report('summary', f"{len(users)} member(s).", users=len(users))
+    return 0
+
+
+def cmd_delete(args, report):
+    user = find_user(args.name)
+    if not user:
+        report('error', f"Error: No user found with the name '{args.name}'.", error='not found')
+        return 1
+    held = user.vote_count()
+    if args.dry_run:
+        report('summary', f"Dry run: would delete '{user.name}' and their {held} vote(s).", name=user.name,
+               votes=held, dry_run=True)
+        return 0
+    if not args.yes:
+        report('error', "Error: Pass --yes to confirm the deletion.", error='not confirmed')
+        return 1
+    try:
+        clear_votes(user.id)
+        db.session.delete(user)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        report('error', f"Error: Failed to delete user '{user.name}'. Details: {e}", error=str(e))
+        return 1
+    bump_data_version()
+    report('deleted', f"Success: User '{args.name}' has been deleted.", name=args.name, votes=held)
+    return 0
+
+
+def cmd_search_index(args, report):
+    return 0 if rebuild_search(report) else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Board game club administration. Run without a command for the interactive menu.")
+    parser.add_argument('--json', action='store_true', help="Report progress as JSON lines")
+    commands = parser.add_subparsers(dest='command')
+
+    add = commands.add_parser('add', help="Add a member and sync their games")
+    add.add_argument('name')
+    add.add_argument('bgg_username')
+    add.set_defaults(handler=cmd_add)
+
+    bulk = commands.add_parser('import', help="Add members from a CSV file and sync their games in parallel")
+    bulk.add_argument('csv', help="CSV with name, bgg_username and optional password columns ('-' for stdin)")
+    bulk.set_defaults(handler=cmd_import)
+
+    for command in (add, bulk):
+        command.add_argument('--no-sync', action='store_true', help="Add the members without fetching their games")
+
+    sync = commands.add_parser('sync', help="Sync the named members, or everyone")
+    sync.add_argument('names', nargs='*', metavar='NAME')
+    sync.set_defaults(handler=cmd_sync)
+
+    listing = commands.add_parser('list', help="List members")
+    listing.set_defaults(handler=cmd_list)
+
+    delete = commands.add_parser('delete', help="Delete a member and their votes")
+    delete.add_argument('name')
+    delete.add_argument('--yes', action='store_true', help="Confirm the deletion")
+    delete.set_defaults(handler=cmd_delete)
+
+    search = commands.add_parser('search-index', help="Create or rebuild the game search index")
+    search.set_defaults(handler=cmd_search_index)
+
+    for command in (add, bulk, sync, delete):
+        command.add_argument('--dry-run', action='store_true', help="Show what would change without changing anything")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # The app is only built once the arguments are known to be valid, so --help stays instant
+    app = create_app('cli')
+    with app.app_context():
+        if args.command:
+            verify_admin_auth(os.getenv('ADMIN_CLI_PASSWORD'))
+            sys.exit(args.handler(args, Reporter(args.json)))
+        interactive_menu()
 
 
-def main():
+def interactive_menu():
     verify_admin_auth()  
     print("\nAdmin Commands:")
     print("1. Add a new user")
@@ -179,9 +493,11 @@ def main():
     print("4. List all users")
     print("5. Update a user's games")
     print("6. Update all club's games")
-    print("7. Exit")
+    print("7. Repair vote counters")
+    print("8. Rebuild search index")
+    print("9. Exit")
     while True:
-        choice = input("\nSelect an option (1-7): ").strip()
+        choice = input("\nSelect an option (1-9): ").strip()
         if choice == '1':
             add_user()
         elif choice == '2':
@@ -195,10 +511,14 @@ def main():
         elif choice == '6':
             update_all_club_games()
         elif choice == '7':
+            repair_vote_counts()
+        elif choice == '8':
+            rebuild_search(Reporter())
+        elif choice == '9':
             print("Exiting admin commands.")
             break
         else:
-            print("Invalid option. Please select a number between 1 and 7.")
+            print("Invalid option. Please select a number between 1 and 9.")
 
 
 if __name__ == '__main__':
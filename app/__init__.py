@@ -2,30 +2,69 @@
 
 import os
 from flask import Flask
-from apscheduler.schedulers.background import BackgroundScheduler
 from dotenv import load_dotenv
 import atexit
 import logging
 from logging.handlers import RotatingFileHandler
-from .extensions import db, migrate, login, limiter, csrf
-from .bgg import update_all_games
+from .extensions import db, login, limiter, csrf, bgg_client, redis_client
+from . import assets, compression, database, metrics
 
 load_dotenv()
 
-def create_app():
+PROFILES = ('web', 'worker', 'cli')
+
+
+def create_app(profile=None):
+    """Create the app with only what its role needs.
+
+    web: the site, with logins, CSRF, rate limiting and file logging, and the
+    sync scheduler if SCHEDULER_ENABLED is set.
+    worker: the database and BGG client for sync_worker.py.
+    cli: the database and BGG client for admin_commands.py and flask commands.
+
+    The profile defaults to APP_PROFILE, else web. Nothing here opens a
+    connection or starts a thread unless the profile needs it, so the app can
+    be built once in the gunicorn master (preload_app) and shared by the
+    workers.
+    """
+    profile = profile or os.getenv('APP_PROFILE', 'web')
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown app profile '{profile}', expected one of {', '.join(PROFILES)}")
+
     app = Flask(__name__)
     app.config.from_object('config.Config')
+    app.config['APP_PROFILE'] = profile
 
     # Initialize extensions with the app
+    from . import models, search  # noqa: F401  Registers the tables and search index for every profile, including 'flask db'
     db.init_app(app)
-    migrate.init_app(app, db)
+    database.init_app(app)
+    search.init_app(app)
+    redis_client.init_app(app)
+    bgg_client.init_app(app)
+    metrics.init_app(app)
+    if profile == 'cli' or os.environ.get('FLASK_RUN_FROM_CLI'):
+        # Only the 'flask db' commands need Alembic, which is slow to import
+        from flask_migrate import Migrate
+        Migrate(app, db, include_object=search.include_object)
+
+    if profile == 'web':
+        init_web(app)
+    return app
+
+
+def init_web(app):
     login.init_app(app)
     limiter.init_app(app)
     csrf.init_app(app)
+    assets.init_app(app)
+    compression.init_app(app)
 
     # Register Blueprints
     from .routes import main as main_blueprint
     app.register_blueprint(main_blueprint)
+    from .api import api as api_blueprint
+    app.register_blueprint(api_blueprint)
 
     # Setup Logging
     if not app.debug:
@@ -44,24 +83,26 @@ def create_app():
         # Setup debug logging
         logging.basicConfig(level=logging.DEBUG)
 
-    # Setup Scheduler
-    scheduler = BackgroundScheduler()
+    # Setup Scheduler. Normally off: the nightly sync runs in sync_worker.py so
+    # that gunicorn workers and admin_commands.py never schedule their own copy.
+    if app.config['SCHEDULER_ENABLED']:
+        from apscheduler.schedulers.background import BackgroundScheduler
+        from .sync import run_sync
+        scheduler = BackgroundScheduler()
 
-    def scheduled_job():
-        app.logger.info("Scheduled job started: Updating all games.")
-        update_all_games(app)
-        app.logger.info("Scheduled job completed: All games updated.")
+        def scheduled_job():
+            app.logger.info("Scheduled job started: Updating all games.")
+            run_sync(app)
+            app.logger.info("Scheduled job completed: All games updated.")
 
-    scheduler.add_job(func=scheduled_job, trigger="interval", hours=24)
-    scheduler.start()
+        scheduler.add_job(func=scheduled_job, trigger="interval", hours=app.config['SYNC_INTERVAL_HOURS'])
+        scheduler.start()
 
-    # Shut down the scheduler when exiting the app
-    atexit.register(lambda: scheduler.shutdown())
+        # Shut down the scheduler when exiting the app
+        atexit.register(lambda: scheduler.shutdown())
 
     # Register user_loader callback for Flask-Login
     @login.user_loader
     def load_user(user_id):
-        from .models import User
-        return User.query.get(int(user_id))
-
-    return app
+        from .user_cache import load_user
+        return load_user(int(user_id))
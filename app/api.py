@@ -0,0 +1,136 @@
+# app/api.py
+from flask import Blueprint, jsonify, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import select
+from .models import db, Game
+from .queries import PAGE_SIZE, MAX_PAGE_SIZE, TAG_FILTERS, games_page, tags_by_game, voters_by_game, voted_game_ids
+from .search import SEARCH_LIMIT, MAX_SEARCH_LIMIT, search_games
+from .planner import PLAN_LIMIT, MAX_PLAN_LIMIT, get_index
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+
+def thumbnail_url(game, ext):
+    """URL of the locally cached thumbnail variant, or None if it has not been cached."""
+    if not game.thumbnail_hash:
+        return None
+    return url_for('main.thumbnail', digest=game.thumbnail_hash, ext=ext)
+
+
+def game_to_dict(game, voters, voted, tags=None, show_votes=True):
+    """Serialize a game; without show_votes the vote count, voters and vote URL are left out, as for visitors."""
+    tags = tags or {}
+    return {
+        'id': game.id,
+        'bgg_id': game.bgg_id,
+        'name': game.name,
+        'thumbnail': thumbnail_url(game, 'jpg') or game.thumbnail or None,
+        'thumbnail_webp': thumbnail_url(game, 'webp'),
+        'min_players': game.min_players,
+        'max_players': game.max_players,
+        'playing_time': game.playing_time,
+        'weight': game.weight,
+        'rating': game.rating,
+        'categories': tags.get('category', []),
+        'mechanics': tags.get('mechanic', []),
+        'designers': tags.get('designer', []),
+        'vote_count': game.vote_count if show_votes else None,
+        'voters': voters if show_votes else [],
+        'voted': voted,
+        'vote_url': url_for('main.vote', game_id=game.id) if show_votes else None,
+    }
+
+
+def games_to_dicts(rows):
+    # Votes are for members only, as on the index page
+    show_votes = current_user.is_authenticated
+    game_ids = [game.id for game in rows]
+    voters = voters_by_game(game_ids) if show_votes else {}
+    tags = tags_by_game(game_ids)
+    voted_ids = voted_game_ids(current_user) if show_votes and rows else set()
+    return [game_to_dict(game, voters.get(game.id, []), game.id in voted_ids, tags.get(game.id), show_votes)
+            for game in rows]
+
+
+@api.route('/games')
+def games():
+    """List games one page at a time.
+
+    Query parameters: sort (votes or name), cursor (next_cursor from the
+    previous page), limit, min_players, max_players, max_time, owner,
+    min_weight, max_weight, and category, mechanic and designer, which match
+    BGG's names exactly and may be repeated to require several. owner is for
+    members only, as it reveals who belongs to the club.
+    """
+    owner = request.args.get('owner')
+    if owner and not current_user.is_authenticated:
+        return jsonify(error='Log in to filter by owner.'), 403
+    limit = min(max(request.args.get('limit', PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    try:
+        rows, next_cursor = games_page(
+            sort=request.args.get('sort', 'votes'),
+            cursor=request.args.get('cursor'),
+            limit=limit,
+            min_players=request.args.get('min_players', type=int),
+            max_players=request.args.get('max_players', type=int),
+            max_time=request.args.get('max_time', type=int),
+            owner=owner,
+            min_weight=request.args.get('min_weight', type=float),
+            max_weight=request.args.get('max_weight', type=float),
+            tags=[(kind, name) for kind in TAG_FILTERS for name in request.args.getlist(kind)],
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+
+    return jsonify(games=games_to_dicts(rows), next_cursor=next_cursor)
+
+
+@api.route('/search')
+def search():
+    """Games whose name matches q, best matches first, for type-ahead.
+
+    Query parameters: q and limit. Queries shorter than two characters
+    return no games.
+    """
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', SEARCH_LIMIT, type=int), 1), MAX_SEARCH_LIMIT)
+    return jsonify(query=query, games=games_to_dicts(search_games(query, limit)))
+
+
+@api.route('/plan')
+@login_required
+def plan():
+    """Games tonight's attendees can play, most voted first. Members only: it reveals who belongs to the club.
+
+    Query parameters: attendee (a member name, repeated), players (the head
+    count, defaults to the number of attendees; raise it for guests),
+    max_time in minutes, and limit. Only games an attendee owns are listed,
+    each with the attendees who own it.
+    """
+    names = [name for name in request.args.getlist('attendee') if name.strip()]
+    if not names:
+        return jsonify(error='Name at least one attendee.'), 400
+    index = get_index()
+    attendees, unknown = index.find_members(names)
+    if unknown:
+        return jsonify(error=f"Unknown members: {', '.join(unknown)}"), 400
+    players = request.args.get('players', len(attendees), type=int)
+    if players < 1:
+        return jsonify(error='players must be at least 1.'), 400
+    max_time = request.args.get('max_time', type=int)
+    limit = min(max(request.args.get('limit', PLAN_LIMIT, type=int), 1), MAX_PLAN_LIMIT)
+
+    matches, total = index.plan(attendees, players, max_time, limit)
+    games = {game.id: game for game in db.session.execute(
+        select(Game).where(Game.id.in_([game_id for game_id, _ in matches]))
+    ).scalars()}
+    owners = {game_id: [attendees[user_id] for user_id in owner_ids] for game_id, owner_ids in matches}
+    # A game deleted since the index was built is skipped
+    rows = [games[game_id] for game_id, _ in matches if game_id in games]
+    return jsonify(
+        attendees=sorted(attendees.values()),
+        players=players,
+        max_time=max_time,
+        total=total,
+        games=[dict(card, owners=owners[card['id']]) for card in games_to_dicts(rows)],
+    )
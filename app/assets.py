@@ -0,0 +1,130 @@
+# app/assets.py
+"""Fingerprinted, precompressed static assets.
+
+build_assets.py copies every file under app/static into static/dist/ with a
+content hash in its name. Next to each text file it writes a gzip variant,
+and a Brotli one when the brotli package is installed. It also writes a
+manifest mapping the original names to the fingerprinted ones.
+
+With a manifest present, url_for('static', filename=...) returns the
+fingerprinted URL. Those URLs are served with year-long immutable caching,
+in the best encoding the browser accepts. Without a manifest (development),
+static files are served as before.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from flask import current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+ASSET_MAX_AGE = 365 * 24 * 3600  # Fingerprinted URLs change with their content, so they never go stale
+COMPRESSED_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))  # Most preferred first
+COMPRESSIBLE_MIMETYPES = ('text/css', 'text/javascript', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+def fingerprinted_name(name, data):
+    root, ext = os.path.splitext(name)
+    return f"{root}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def compressible(name):
+    return mimetypes.guess_type(name)[0] in COMPRESSIBLE_MIMETYPES
+
+
+def write_compressed(path, data):
+    """Write gzip and Brotli variants of a file next to it, where they are smaller. Returns the encodings written."""
+    variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    written = []
+    for encoding, suffix in COMPRESSED_SUFFIXES:
+        if encoding in variants and len(variants[encoding]) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(variants[encoding])
+            written.append(encoding)
+    return written
+
+
+def build(static_folder):
+    """Rebuild static/dist and its manifest from the files under static_folder. Returns the manifest."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    manifest = {}
+    for directory, subdirectories, files in os.walk(static_folder):
+        subdirectories[:] = [name for name in subdirectories if os.path.join(directory, name) != dist]
+        for filename in sorted(files):
+            source = os.path.join(directory, filename)
+            name = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            target = f"{DIST_DIR}/{fingerprinted_name(name, data)}"
+            path = os.path.join(static_folder, *target.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+            if compressible(name):
+                write_compressed(path, data)
+            manifest[name] = target
+    with open(os.path.join(dist, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    """Return the manifest written by build, or an empty one if assets have not been built."""
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def send_asset(filename):
+    """Serve a fingerprinted asset in the best encoding the browser accepts."""
+    static_folder = current_app.static_folder
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = None
+    for name, suffix in COMPRESSED_SUFFIXES:
+        if request.accept_encodings[name] and os.path.exists(os.path.join(static_folder, *f'{filename}{suffix}'.split('/'))):
+            encoding = name
+            filename += suffix
+            break
+    response = send_from_directory(static_folder, filename, mimetype=mimetype, max_age=ASSET_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if compressible(filename.rsplit('.', 1)[0] if encoding else filename):
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_app(app):
+    manifest = load_manifest(app.static_folder)
+    # Part of the cache keys and ETags of pages that link to assets, so a deploy with new assets re-renders them
+    app.config['ASSET_VERSION'] = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    if not manifest:
+        return
+    fingerprinted = set(manifest.values())
+    serve_static = app.view_functions['static']
+
+    @app.url_defaults
+    def fingerprint_static_url(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    def static(filename):
+        if filename in fingerprinted:
+            return send_asset(filename)
+        return serve_static(filename=filename)
+
+    app.view_functions['static'] = static
@@ -1,21 +1,52 @@
-import requests
+import io
 import xml.etree.ElementTree as ET
-import time
-from .models import db, Game, User
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from .models import db, Game, Tag, User, game_tags, user_games, votes
+from .cache import bump_data_version
+from .extensions import bgg_client
+from .thumbnails import cache_thumbnails
+from . import metrics
+from flask import current_app
+from sqlalchemy import delete, exists, insert, select, update
 from sqlalchemy.exc import SQLAlchemyError
 import logging
+import time
 
 BGG_COLLECTION_URL = "https://www.boardgamegeek.com/xmlapi2/collection"
 BGG_THING_URL = "https://www.boardgamegeek.com/xmlapi2/thing"
-MAX_RETRIES = 5  # Number of retries for rate limiting
-RETRY_DELAY = 60  # Delay between retries in seconds when 429 is encountered
 BATCH_SIZE = 20  # Max number of items that can be fetched in one request
+SYNC_WORKERS = 4  # Members synced concurrently by update_all_games
+DETAILS_TTL_HOURS = 24 * 30  # Age after which stored game details are fetched again; 0 never refreshes
+QUERY_CHUNK_SIZE = 500  # Max number of IDs bound into a single IN (...) query
+
+def iter_items(source):
+    """Yield each top-level <item> of a BGG XML response as soon as it has been parsed.
+
+    source may be bytes or a file-like object such as a streamed response body.
+    Each item is cleared once the caller moves on, so memory stays flat no matter
+    how large the response is; callers must copy out what they need before
+    advancing the iterator.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    context = ET.iterparse(source, events=('start', 'end'))
+    _, root = next(context)
+    depth = 0
+    for event, elem in context:
+        if event == 'start':
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 0:
+            if elem.tag == 'item':
+                yield elem
+            elem.clear()
+            root.clear()
 
 def parse_bgg_collection(xml_data):
     """Parse the game IDs from the user's collection XML."""
-    root = ET.fromstring(xml_data)
-    game_ids = [item.attrib['objectid'] for item in root.findall('item') if item.attrib.get('subtype') == 'boardgame']
-    return game_ids
+    return [item.attrib['objectid'] for item in iter_items(xml_data) if item.attrib.get('subtype') == 'boardgame']
 
 def fetch_user_games(bgg_username):
     """Fetch game IDs for a user from BGG."""
@@ -25,124 +56,441 @@ def fetch_user_games(bgg_username):
         'stats': 1,
         'type': 'boardgame'
     }
-    retries = 0
-    while retries < MAX_RETRIES:
-        try:
-            response = requests.get(BGG_COLLECTION_URL, params=params)
-            response.raise_for_status()
-            return parse_bgg_collection(response.content)
-        except requests.exceptions.HTTPError as http_err:
-            if response.status_code == 429:
-                retries += 1
-                logging.warning(f"Rate limited while fetching games for user {bgg_username}, retrying in {RETRY_DELAY} seconds... (Attempt {retries}/{MAX_RETRIES})")
-                time.sleep(RETRY_DELAY)
-            else:
-                raise http_err
-    raise Exception(f"Failed to fetch user games for {bgg_username} after {MAX_RETRIES} retries due to rate limiting.")
+    with bgg_client.get(BGG_COLLECTION_URL, params, stream=True) as response:
+        # Parse straight off the socket instead of buffering the whole body
+        response.raw.decode_content = True
+        return parse_bgg_collection(response.raw)
+
+INT_DETAIL_FIELDS = {
+    'minplayers': 'min_players',
+    'maxplayers': 'max_players',
+    'playingtime': 'playing_time',
+}
+FLOAT_STATISTICS = {
+    'averageweight': 'weight',
+    'average': 'rating',
+}
+TAG_KINDS = {  # BGG link types stored as tags, and their Tag.kind
+    'boardgamecategory': 'category',
+    'boardgamemechanic': 'mechanic',
+    'boardgamedesigner': 'designer',
+}
+
+def parse_float(value):
+    """Parse a BGG statistic, where 0 means nobody has rated or weighed the game yet."""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number or None
 
 def parse_game_details(item):
-    """Parse the game details from an XML item."""
+    """Parse the game details and tags from an XML item in a single pass over its children.
+
+    Returns the Game column values plus 'tags', a list of (kind, BGG ID, name)
+    for the game's categories, mechanics and designers.
+    """
     if item is None:
         raise ValueError("Invalid XML: 'item' element is None")
 
-    name_elem = item.find("name[@type='primary']")
-    if name_elem is None:
-        raise ValueError("Game has no primary name element")
-
-    name = name_elem.attrib.get('value', 'Unknown Game')
-    thumbnail = item.find('thumbnail').text if item.find('thumbnail') is not None else ''
-    min_players = item.find('minplayers').attrib.get('value') if item.find('minplayers') is not None else None
-    max_players = item.find('maxplayers').attrib.get('value') if item.find('maxplayers') is not None else None
-    playing_time = item.find('playingtime').attrib.get('value') if item.find('playingtime') is not None else None
-    average_rating = item.find('statistics/rating/average')
-    difficulty = average_rating.attrib.get('value') if average_rating is not None else 'N/A'
-    
-    return {
-        'name': name,
-        'thumbnail': thumbnail,
-        'min_players': int(min_players) if min_players else None,
-        'max_players': int(max_players) if max_players else None,
-        'playing_time': int(playing_time) if playing_time else None,
-        'difficulty': difficulty
+    name = None
+    details = {
+        'thumbnail': '',
+        'min_players': None,
+        'max_players': None,
+        'playing_time': None,
+        'weight': None,
+        'rating': None,
     }
+    tags = []
+    for child in item:
+        tag = child.tag
+        if tag == 'link':
+            kind = TAG_KINDS.get(child.get('type'))
+            bgg_id = child.get('id')
+            if kind and bgg_id and child.get('value'):
+                tags.append((kind, int(bgg_id), child.get('value')))
+        elif tag == 'name':
+            if name is None and child.get('type') == 'primary':
+                name = child.get('value', 'Unknown Game')
+        elif tag in INT_DETAIL_FIELDS:
+            value = child.get('value')
+            details[INT_DETAIL_FIELDS[tag]] = int(value) if value else None
+        elif tag == 'thumbnail':
+            details['thumbnail'] = child.text or ''
+        elif tag == 'statistics':
+            for statistic in child.iter():
+                if statistic.tag in FLOAT_STATISTICS:
+                    details[FLOAT_STATISTICS[statistic.tag]] = parse_float(statistic.get('value'))
+
+    if name is None:
+        raise ValueError("Game has no primary name element")
+    return {'name': name, **details, 'tags': tags}
 
 def fetch_game_details_batch(bgg_ids):
     """Fetch game details for a batch of BGG IDs, handling rate limits."""
-    retries = 0
     params = {
         'id': ','.join(bgg_ids),  # Fetch a batch of game details by passing multiple IDs
         'stats': 1
     }
-    while retries < MAX_RETRIES:
+    return bgg_client.get(BGG_THING_URL, params).content
+
+def insert_ignoring_conflicts(table, index_elements):
+    """Build an INSERT that skips rows which already exist.
+
+    Concurrent sync workers may try to insert the same game at the same time; on
+    SQLite and PostgreSQL the loser silently skips the row instead of failing
+    the whole batch.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(table)
+    return dialect_insert(table).on_conflict_do_nothing(index_elements=index_elements)
+
+def prefetch_games(bgg_ids):
+    """Return a mapping of BGG ID to Game.id for the given BGG IDs, using a single query."""
+    if not bgg_ids:
+        return {}
+    rows = db.session.execute(select(Game.bgg_id, Game.id).where(Game.bgg_id.in_(bgg_ids)))
+    return {bgg_id: game_id for bgg_id, game_id in rows}
+
+def fetch_owned_games(user_id):
+    """Return a mapping of BGG ID to Game.id for the games currently linked to the user."""
+    rows = db.session.execute(
+        select(Game.bgg_id, Game.id).join(user_games, user_games.c.game_id == Game.id).where(user_games.c.user_id == user_id)
+    )
+    return {bgg_id: game_id for bgg_id, game_id in rows}
+
+def utcnow():
+    """Naive UTC timestamp, matching how DateTime columns are stored."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def details_ttl():
+    """How long fetched game details stay fresh, or None if known games are never refreshed."""
+    hours = current_app.config.get('BGG_DETAILS_TTL_HOURS', DETAILS_TTL_HOURS)
+    return timedelta(hours=hours) if hours else None
+
+def find_stale_game_ids(bgg_ids, ttl):
+    """Return the BGG IDs not yet in the Game table or, if ttl is set, fetched longer than ttl ago."""
+    bgg_ids = [int(bgg_id) for bgg_id in bgg_ids]
+    fresh = set()
+    for i in range(0, len(bgg_ids), QUERY_CHUNK_SIZE):
+        query = select(Game.bgg_id).where(Game.bgg_id.in_(bgg_ids[i:i + QUERY_CHUNK_SIZE]))
+        if ttl is not None:
+            query = query.where(Game.details_fetched_at >= utcnow() - ttl)
+        fresh.update(db.session.execute(query).scalars())
+    return [bgg_id for bgg_id in bgg_ids if bgg_id not in fresh]
+
+def store_game_tags(tags_by_game, replace=()):
+    """Link games to their tags, given a mapping of Game.id to (kind, BGG ID, name) tuples.
+
+    Unknown tags are inserted, the links of the games in replace (those that
+    may already have some) are deleted, and the new links inserted, each with
+    one bulk statement. The caller commits.
+
+    Rows are inserted in key order. Detail batches run in parallel, and on
+    Postgres two of them inserting the same new tags in different orders
+    could deadlock on each other's row locks.
+    """
+    distinct = {(kind, bgg_id): name for tags in tags_by_game.values() for kind, bgg_id, name in tags}
+    tag_ids = {}
+    if distinct:
+        db.session.execute(
+            insert_ignoring_conflicts(Tag.__table__, ['kind', 'bgg_id']),
+            [{'kind': kind, 'bgg_id': bgg_id, 'name': name} for (kind, bgg_id), name in sorted(distinct.items())]
+        )
+        rows = db.session.execute(
+            select(Tag.kind, Tag.bgg_id, Tag.id).where(Tag.bgg_id.in_(list({bgg_id for _, bgg_id in distinct})))
+        )
+        tag_ids = {(kind, bgg_id): tag_id for kind, bgg_id, tag_id in rows}
+    if replace:
+        db.session.execute(delete(game_tags).where(game_tags.c.game_id.in_(list(replace))))
+    links = {
+        (game_id, tag_ids[kind, bgg_id])
+        for game_id, tags in tags_by_game.items()
+        for kind, bgg_id, _ in tags if (kind, bgg_id) in tag_ids
+    }
+    if links:
+        db.session.execute(
+            insert_ignoring_conflicts(game_tags, ['game_id', 'tag_id']),
+            [{'game_id': game_id, 'tag_id': tag_id} for game_id, tag_id in sorted(links)]
+        )
+
+def refresh_game_details_batch(batch_ids):
+    """Fetch one batch of game details from BGG and store them.
+
+    New games are inserted and known ones updated in bulk, stamping
+    details_fetched_at, with a single commit. Returns the number of games stored.
+    """
+    xml_data = fetch_game_details_batch([str(bgg_id) for bgg_id in batch_ids])
+    fetched_at = utcnow()
+
+    details = {}
+    tags = {}
+    for item in iter_items(xml_data):
+        bgg_id = item.attrib.get('id')
+        if not bgg_id:
+            logging.warning(f"Game item in batch {batch_ids} is missing an 'id'. Skipping.")
+            continue
         try:
-            response = requests.get(BGG_THING_URL, params=params)
-            response.raise_for_status()
-            return response.content
-        except requests.exceptions.HTTPError as http_err:
-            if response.status_code == 429:
-                retries += 1
-                logging.warning(f"Rate limited while fetching game details for BGG IDs: {bgg_ids}, retrying in {RETRY_DELAY} seconds... (Attempt {retries}/{MAX_RETRIES})")
-                time.sleep(RETRY_DELAY)
-            else:
-                raise http_err
-    raise Exception(f"Failed to fetch game details for BGG IDs: {bgg_ids} after {MAX_RETRIES} retries due to rate limiting.")
+            row = parse_game_details(item)
+        except ValueError as ve:
+            logging.error(f"Error parsing game details for BGG ID {bgg_id}: {ve}")
+            continue  # Skip this game if there was a parsing error
+        tags[int(bgg_id)] = row.pop('tags')
+        details[int(bgg_id)] = dict(row, details_fetched_at=fetched_at)
 
-def update_games_for_user(user):
-    """Update games owned by a user by fetching them from BGG."""
+    try:
+        known = prefetch_games(list(details))
+        new_rows = [dict(row, bgg_id=bgg_id) for bgg_id, row in details.items() if bgg_id not in known]
+        updated_rows = [dict(row, id=known[bgg_id]) for bgg_id, row in details.items() if bgg_id in known]
+        game_ids = dict(known)
+        if new_rows:
+            db.session.execute(insert_ignoring_conflicts(Game.__table__, ['bgg_id']), new_rows)
+            game_ids.update(prefetch_games([row['bgg_id'] for row in new_rows]))
+        if updated_rows:
+            db.session.execute(update(Game), updated_rows)
+        store_game_tags(
+            {game_ids[bgg_id]: links for bgg_id, links in tags.items() if bgg_id in game_ids},
+            replace=known.values()
+        )
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+
+    if new_rows:
+        logging.info(f"Added {len(new_rows)} games, refreshed {len(updated_rows)}.")
+    return len(details)
+
+def refresh_game_details(bgg_ids, ttl=None):
+    """Fetch details for the given BGG IDs that are missing or older than the TTL.
+
+    Returns a dict with the number of stale IDs, games stored and failed batches.
+    """
+    stale_ids = find_stale_game_ids(bgg_ids, details_ttl() if ttl is None else ttl or None)
+    stats = {'stale': len(stale_ids), 'fetched': 0, 'failed_batches': 0}
+    for i in range(0, len(stale_ids), BATCH_SIZE):
+        batch_ids = stale_ids[i:i + BATCH_SIZE]
+        try:
+            stats['fetched'] += refresh_game_details_batch(batch_ids)
+        except Exception as e:
+            stats['failed_batches'] += 1
+            logging.error(f"Error fetching game details for batch: {batch_ids}. Error: {e}")
+            continue  # Continue to the next batch in case of failure
+    return stats
+
+def sync_user_links(user_id, bgg_ids):
+    """Make a user's ownership links match their fetched collection.
+
+    The collection is diffed against the games currently linked to the user:
+    links for newly listed games are inserted and links for games no longer
+    listed are deleted, each with one bulk statement, and committed together.
+    Listed IDs with no stored Game (e.g. a failed detail batch) are skipped and
+    picked up by the next sync.
+
+    An empty collection is treated as a failed fetch rather than a member who
+    sold everything, so it never removes links.
+
+    Returns (linked, unlinked) counts.
+    """
+    listed = set(int(bgg_id) for bgg_id in bgg_ids)
+    owned = fetch_owned_games(user_id)
+    added_ids = [bgg_id for bgg_id in listed if bgg_id not in owned]
+    removed = [game_id for bgg_id, game_id in owned.items() if bgg_id not in listed] if listed else []
+
+    known = {}
+    for i in range(0, len(added_ids), QUERY_CHUNK_SIZE):
+        known.update(prefetch_games(added_ids[i:i + QUERY_CHUNK_SIZE]))
+    try:
+        if known:
+            db.session.execute(
+                insert_ignoring_conflicts(user_games, ['user_id', 'game_id']),
+                [{'user_id': user_id, 'game_id': game_id} for game_id in known.values()]
+            )
+        for i in range(0, len(removed), QUERY_CHUNK_SIZE):
+            db.session.execute(delete(user_games).where(
+                user_games.c.user_id == user_id,
+                user_games.c.game_id.in_(removed[i:i + QUERY_CHUNK_SIZE])
+            ))
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+    return len(known), len(removed)
+
+def delete_orphan_games():
+    """Delete games that nobody owns or votes for, with their tag links, and commit.
+
+    Tags no game has any more are deleted too. Returns the number of games deleted.
+    """
+    owned = exists().where(user_games.c.game_id == Game.id)
+    voted = exists().where(votes.c.game_id == Game.id)
+    orphans = select(Game.id).where(~owned, ~voted)
+    try:
+        db.session.execute(delete(game_tags).where(game_tags.c.game_id.in_(orphans)))
+        result = db.session.execute(delete(Game).where(~owned, ~voted))
+        db.session.execute(delete(Tag).where(~exists().where(game_tags.c.tag_id == Tag.id)))
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+    if result.rowcount:
+        logging.info(f"Removed {result.rowcount} games that no member owns or votes for.")
+    return result.rowcount
+
+def fetch_collection(user):
+    """Fetch a user's collection as a de-duplicated list of BGG IDs."""
     logging.info(f"Fetching games for user: {user.name} ({user.bgg_username})")
-    
     try:
-        game_ids = fetch_user_games(user.bgg_username)
+        # A collection lists one item per copy, so drop duplicate IDs up front
+        game_ids = list(dict.fromkeys(fetch_user_games(user.bgg_username)))
         logging.info(f"Found {len(game_ids)} games for user '{user.name}'.")
     except Exception as e:
         logging.error(f"Error fetching games for user '{user.name}': {e}")
-        return
+        raise
+    return game_ids
+
+def update_games_for_user(user):
+    """Update games owned by a user by fetching them from BGG.
 
-    for i in range(0, len(game_ids), BATCH_SIZE):
-        batch_ids = game_ids[i:i + BATCH_SIZE]
+    The collection is diffed against the member's current games, and only games
+    not yet in the Game table (or older than BGG_DETAILS_TTL_HOURS, if set) are
+    fetched from the thing endpoint. Games the member no longer lists are
+    unlinked and, with BGG_SYNC_DELETE_ORPHANS, deleted if nobody else owns or
+    votes for them.
+
+    Returns a dict of counters for the sync. Raises if the collection itself
+    could not be fetched; failed detail batches are logged and counted.
+    """
+    started = time.monotonic()
+    try:
+        game_ids = fetch_collection(user)
+    except Exception as e:
+        metrics.observe_sync('user', time.monotonic() - started, failed=[user.name], error=e)
+        raise
+    details = refresh_game_details(game_ids)
+    linked, unlinked = sync_user_links(user.id, game_ids)
+    if linked or unlinked:
+        logging.info(f"Associated {linked} games with user '{user.name}', removed {unlinked}.")
+    deleted = delete_orphan_games() if unlinked and current_app.config.get('BGG_SYNC_DELETE_ORPHANS') else 0
+    thumbnails = cache_thumbnails()
+    if linked or unlinked or details['fetched'] or thumbnails:
+        bump_data_version()
+    metrics.observe_sync(
+        'user', time.monotonic() - started, synced={user.name: {'games': len(game_ids), 'linked': linked, 'unlinked': unlinked}},
+        details_fetched=details['fetched'], thumbnails=thumbnails
+    )
+    return {
+        'games': len(game_ids), 'linked': linked, 'unlinked': unlinked, 'deleted_games': deleted,
+        'thumbnails': thumbnails, **details
+    }
+
+def fetch_collection_by_id(app, user_id):
+    """Fetch one member's collection inside its own app context so it can run on a worker thread."""
+    with app.app_context():
         try:
-            xml_data = fetch_game_details_batch(batch_ids)
-            root = ET.fromstring(xml_data)
-            for item in root.findall('item'):
-                bgg_id = item.attrib.get('id')
-                if not bgg_id:
-                    logging.warning(f"Game item in batch {batch_ids} is missing an 'id'. Skipping.")
-                    continue
-
-                game = Game.query.filter_by(bgg_id=bgg_id).first()
-
-                if not game:
-                    try:
-                        details = parse_game_details(item)
-                        game = Game(
-                            bgg_id=bgg_id,
-                            name=details['name'],
-                            thumbnail=details['thumbnail'],
-                            min_players=details['min_players'],
-                            max_players=details['max_players'],
-                            playing_time=details['playing_time'],
-                            difficulty=details['difficulty']
-                        )
-                        db.session.add(game)
-                        db.session.commit()
-                        logging.info(f"Added game: {game.name} (ID: {game.bgg_id})")
-                    except ValueError as ve:
-                        logging.error(f"Error parsing game details for BGG ID {bgg_id}: {ve}")
-                        continue  # Skip this game if there was a parsing error
-                
-                if game not in user.owned_games:
-                    user.owned_games.append(game)
-                    db.session.commit()
-                    logging.info(f"Associated game '{game.name}' with user '{user.name}'")
-        except Exception as e:
-            logging.error(f"Error fetching game details for user '{user.name}' in batch: {batch_ids}. Error: {e}")
-            continue  # Continue to the next batch in case of failure
+            return fetch_collection(db.session.get(User, user_id))
+        finally:
+            db.session.remove()
 
-def update_all_games(app):
-    """Update games for all users."""
+def refresh_game_details_batch_in_context(app, batch_ids):
+    """Run refresh_game_details_batch inside its own app context for a worker thread."""
     with app.app_context():
-        users = User.query.all()
-        logging.info(f"Starting update for all users. Total users: {len(users)}")
-        for user in users:
-            update_games_for_user(user)
-        logging.info("Completed updating games for all users.")
+        try:
+            return refresh_game_details_batch(batch_ids)
+        finally:
+            db.session.remove()
+
+def update_all_games(app, workers=None, progress=None, user_ids=None):
+    """Update games for all users, fetching each game's details at most once.
+
+    The sync runs in three phases: every member's collection is fetched on a
+    bounded pool of workers, details are fetched once for the union of all
+    collections (skipping games already known), and each member's ownership
+    links are then diffed against their collection. Every request goes through
+    bgg_client and its shared rate limiter, so the pool as a whole stays under
+    BGG's request rate. A failure for one member does not stop the others; the
+    returned summary maps member names to their counters or error.
+
+    progress, if given, is called as progress(phase, done, total) as work in
+    each phase ('collections', 'details', 'links') completes. user_ids limits
+    the sync to those members, e.g. the ones just imported.
+    """
+    workers = workers or app.config.get('BGG_SYNC_WORKERS', SYNC_WORKERS)
+    with app.app_context():
+        query = select(User.id, User.name).order_by(User.name)
+        if user_ids is not None:
+            query = query.where(User.id.in_(user_ids))
+        members = db.session.execute(query).all()
+        db.session.remove()
+
+    logging.info(f"Starting update for all users. Total users: {len(members)}, workers: {workers}")
+    report = progress or (lambda phase, done, total: None)
+    summary = {'synced': {}, 'failed': {}, 'details': {'stale': 0, 'fetched': 0, 'failed_batches': 0}}
+    collections = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bgg-sync') as pool:
+        futures = {pool.submit(fetch_collection_by_id, app, user_id): (user_id, name) for user_id, name in members}
+        for future in as_completed(futures):
+            user_id, name = futures[future]
+            try:
+                collections[user_id] = future.result()
+            except Exception as e:
+                logging.error(f"Sync failed for user '{name}': {e}")
+                summary['failed'][name] = str(e)
+            report('collections', len(collections) + len(summary['failed']), len(members))
+
+        with app.app_context():
+            all_ids = list(dict.fromkeys(bgg_id for game_ids in collections.values() for bgg_id in game_ids))
+            stale_ids = find_stale_game_ids(all_ids, details_ttl())
+            db.session.remove()
+        logging.info(f"{len(all_ids)} distinct games across all collections, {len(stale_ids)} need details.")
+        summary['details']['stale'] = len(stale_ids)
+
+        batches = [stale_ids[i:i + BATCH_SIZE] for i in range(0, len(stale_ids), BATCH_SIZE)]
+        futures = {pool.submit(refresh_game_details_batch_in_context, app, batch): batch for batch in batches}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                summary['details']['fetched'] += future.result()
+            except Exception as e:
+                summary['details']['failed_batches'] += 1
+                logging.error(f"Error fetching game details for batch: {futures[future]}. Error: {e}")
+            report('details', done, len(batches))
+
+    with app.app_context():
+        for done, (user_id, name) in enumerate(members, start=1):
+            if user_id not in collections:
+                continue
+            try:
+                linked, unlinked = sync_user_links(user_id, collections[user_id])
+                summary['synced'][name] = {'games': len(collections[user_id]), 'linked': linked, 'unlinked': unlinked}
+            except Exception as e:
+                logging.error(f"Sync failed for user '{name}': {e}")
+                summary['failed'][name] = str(e)
+            report('links', done, len(members))
+
+        summary['deleted_games'] = 0
+        if app.config.get('BGG_SYNC_DELETE_ORPHANS') and any(stats['unlinked'] for stats in summary['synced'].values()):
+            summary['deleted_games'] = delete_orphan_games()
+        summary['thumbnails'] = cache_thumbnails()
+        db.session.remove()
+
+    if (summary['details']['fetched'] or summary['thumbnails']
+            or any(stats['linked'] or stats['unlinked'] for stats in summary['synced'].values())):
+        bump_data_version()
+    logging.info(
+        f"Completed updating games for all users: {len(summary['synced'])} synced, "
+        f"{len(summary['failed'])} failed, {summary['details']['fetched']} game details fetched."
+    )
+    for name, error in sorted(summary['failed'].items()):
+        logging.info(f"  {name}: {error}")
+    for endpoint, counters in bgg_client.stats()['endpoints'].items():
+        logging.info(
+            f"  BGG {endpoint}: {counters['calls']} calls, {counters['retries']} retries, "
+            f"{counters['rate_limited']} rate limited, {counters['queued']} queued, {counters['failures']} failed"
+        )
+    return summary
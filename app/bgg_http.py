@@ -0,0 +1,242 @@
+# app/bgg_http.py
+import logging
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from . import metrics
+
+REQUESTS_PER_SECOND = 0.5  # Sustained request rate allowed across all sync workers
+REQUEST_BURST = 2  # Requests that may be made back to back before throttling kicks in
+CONNECT_TIMEOUT = 10  # Seconds to establish a connection to BGG
+READ_TIMEOUT = 60  # Seconds to wait for BGG between bytes of a response
+MAX_RETRIES = 5  # Retries for 429s, 5xx responses and network errors
+BACKOFF_BASE = 5  # First retry delay in seconds, doubled on every attempt
+BACKOFF_MAX = 120  # Upper bound for a single retry delay
+MAX_QUEUED_POLLS = 10  # Times a 202 "request queued" reply is polled before giving up
+QUEUED_POLL_DELAY = 2  # First delay before polling a queued request again, grows 1.5x per poll
+POOL_SIZE = 8  # Keep-alive connections kept per host, at least the number of sync workers
+RECENT_CALLS = 100  # Calls kept for BGGClient.stats()['recent']
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class BGGError(Exception):
+    """A BGG request failed after all retries."""
+
+
+class RateLimiter:
+    """Thread-safe token bucket shared by every worker that talks to BGG.
+
+    A 429 from any worker calls pause(), which stalls every caller of acquire()
+    until the pause has elapsed, so the pool as a whole backs off.
+    """
+
+    def __init__(self, rate, burst):
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+
+    def configure(self, rate, burst):
+        with self._lock:
+            self.rate = rate
+            self.burst = burst
+            self._tokens = burst
+            self._updated = time.monotonic()
+            self._paused_until = 0.0
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens to every worker for the given number of seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0
+            self._updated = max(self._updated, self._paused_until)
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds requested by a Retry-After header, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class BGGClient:
+    """HTTP client for the BGG XML API shared by every sync worker.
+
+    Requests go through one pooled keep-alive session with gzip and
+    connect/read timeouts, and draw from the shared rate limiter. 429s, 5xx
+    replies and network errors are retried with exponential backoff and full
+    jitter, honouring Retry-After; a 429 pauses the whole pool. A 202 ("your
+    request has been queued") is polled with growing delays until the data is
+    ready. Latency, retries and outcomes are recorded per endpoint.
+    """
+
+    def __init__(self):
+        self.rate_limiter = RateLimiter(REQUESTS_PER_SECOND, REQUEST_BURST)
+        self.timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+        self.max_retries = MAX_RETRIES
+        self.pool_size = POOL_SIZE
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def init_app(self, app):
+        """Apply BGG_* settings from the app config."""
+        self.timeout = (
+            app.config.get('BGG_CONNECT_TIMEOUT', CONNECT_TIMEOUT),
+            app.config.get('BGG_READ_TIMEOUT', READ_TIMEOUT),
+        )
+        with self._session_lock:
+            self.pool_size = max(POOL_SIZE, app.config.get('BGG_SYNC_WORKERS', 0))
+            self._session = None
+
+    @property
+    def session(self):
+        """The pooled session, created on first use so the web app, which never calls BGG, never builds one."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._build_session(self.pool_size)
+        return self._session
+
+    @staticmethod
+    def _build_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'User-Agent': 'BoardGameClub/1.0',
+        })
+        return session
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {}
+            self._recent = deque(maxlen=RECENT_CALLS)
+
+    def stats(self):
+        """Return per-endpoint counters and the most recent calls.
+
+        For each endpoint: calls, failures, attempts, retries, rate_limited
+        (429s), queued (202s), and total/max latency in seconds, where latency
+        covers every attempt and wait of a call.
+        """
+        with self._stats_lock:
+            return {
+                'endpoints': {endpoint: dict(counters) for endpoint, counters in self._stats.items()},
+                'recent': list(self._recent),
+            }
+
+    def _record(self, endpoint, latency, status, attempts, retries, rate_limited, queued, failed):
+        with self._stats_lock:
+            counters = self._stats.setdefault(endpoint, {
+                'calls': 0, 'failures': 0, 'attempts': 0, 'retries': 0, 'rate_limited': 0,
+                'queued': 0, 'latency_total': 0.0, 'latency_max': 0.0,
+            })
+            counters['calls'] += 1
+            counters['failures'] += failed
+            counters['attempts'] += attempts
+            counters['retries'] += retries
+            counters['rate_limited'] += rate_limited
+            counters['queued'] += queued
+            counters['latency_total'] += latency
+            counters['latency_max'] = max(counters['latency_max'], latency)
+            self._recent.append({'endpoint': endpoint, 'status': status, 'attempts': attempts, 'latency': latency})
+        metrics.observe_bgg(endpoint, latency, attempts, retries, rate_limited, queued, failed)
+        logging.debug(f"BGG {endpoint}: status {status} after {attempts} attempt(s) in {latency:.2f}s")
+
+    def _backoff(self, retry):
+        """Exponential backoff with full jitter for the given retry number."""
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** retry))
+
+    def get(self, url, params, stream=False):
+        """GET a BGG API URL and return the successful (200) response.
+
+        With stream=True the body is left unread for the caller, who must close
+        the response. Raises BGGError once retries or queue polls run out, and
+        requests.HTTPError for other error statuses.
+        """
+        endpoint = urlsplit(url).path.rsplit('/', 1)[-1]
+        started = time.monotonic()
+        attempts = retries = rate_limited = queued = 0
+        status = None
+        try:
+            while True:
+                self.rate_limiter.acquire()
+                attempts += 1
+                try:
+                    response = self.session.get(url, params=params, timeout=self.timeout, stream=stream)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    status = type(e).__name__
+                    if retries >= self.max_retries:
+                        raise BGGError(f"{endpoint}: giving up after {attempts} attempts: {e}") from e
+                    delay = self._backoff(retries)
+                    retries += 1
+                    logging.warning(f"BGG {endpoint} request failed ({e}), retrying in {delay:.0f}s ({retries}/{self.max_retries})")
+                    time.sleep(delay)
+                    continue
+
+                status = response.status_code
+                if status == 200:
+                    return response
+                response.close()
+
+                if status == 202:
+                    if queued >= MAX_QUEUED_POLLS:
+                        raise BGGError(f"{endpoint}: request still queued after {queued} polls")
+                    delay = parse_retry_after(response.headers.get('Retry-After')) or QUEUED_POLL_DELAY * 1.5 ** queued
+                    queued += 1
+                    logging.info(f"BGG queued the {endpoint} request, polling again in {delay:.0f}s ({queued}/{MAX_QUEUED_POLLS})")
+                    time.sleep(delay)
+                elif status in RETRY_STATUSES:
+                    if retries >= self.max_retries:
+                        raise BGGError(f"{endpoint}: giving up after {attempts} attempts (HTTP {status})")
+                    delay = parse_retry_after(response.headers.get('Retry-After'))
+                    if delay is None:
+                        delay = self._backoff(retries)
+                    retries += 1
+                    logging.warning(f"BGG {endpoint} returned HTTP {status}, retrying in {delay:.0f}s ({retries}/{self.max_retries})")
+                    if status == 429:
+                        rate_limited += 1
+                        self.rate_limiter.pause(delay)  # Back off the whole pool, not just this worker
+                    else:
+                        time.sleep(delay)
+                else:
+                    response.raise_for_status()
+                    raise BGGError(f"{endpoint}: unexpected HTTP {status}")
+        finally:
+            self._record(
+                endpoint, time.monotonic() - started, status, attempts, retries, rate_limited, queued,
+                failed=int(status != 200)
+            )
+
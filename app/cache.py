@@ -0,0 +1,130 @@
+# app/cache.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+import redis
+from .extensions import redis_client
+from . import metrics
+
+DATA_VERSION_KEY = 'bgc:data_version'  # Bumped whenever votes, games or members change
+RENDER_CACHE_PREFIX = 'bgc:render:'
+RENDER_CACHE_TTL = 24 * 3600  # Seconds a rendered fragment is kept in Redis
+LOCAL_CACHE_SIZE = 8  # Fragments kept in-process when Redis is unreachable
+REDIS_RETRY_INTERVAL = 30  # Seconds to wait before trying Redis again after a failure
+# Without Redis, other workers' bumps are invisible, so the local version also moves on this often
+LOCAL_VERSION_TTL = 10
+
+
+class LRUCache:
+    """Small thread-safe in-process LRU cache."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+
+class RenderCache:
+    """Cache for rendered page fragments, keyed by the shared data version.
+
+    Redis is used when reachable so every worker shares the same fragments and
+    version. When Redis is down the cache falls back to an in-process LRU and a
+    process-local version, which also changes every LOCAL_VERSION_TTL seconds
+    since votes handled by other workers cannot bump it. Redis is only retried
+    every REDIS_RETRY_INTERVAL seconds so an outage does not add a connection
+    attempt to every request.
+    """
+
+    def __init__(self, client, maxsize=LOCAL_CACHE_SIZE):
+        self.client = client
+        self.local = LRUCache(maxsize)
+        self._local_version = 0
+        self._pending_bump = False
+        self._redis_down_until = 0.0
+        self._lock = threading.Lock()
+
+    def redis_available(self):
+        """False while backing off after a Redis failure; other Redis users in the app share this."""
+        return time.monotonic() >= self._redis_down_until
+
+    def redis_failed(self, error):
+        """Record a Redis failure so nothing tries Redis again for REDIS_RETRY_INTERVAL seconds."""
+        if self.redis_available():
+            logging.warning(f"Redis unavailable, retrying in {REDIS_RETRY_INTERVAL} seconds: {error}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_INTERVAL
+
+    def data_version(self):
+        """Return the current data version."""
+        if self.redis_available():
+            try:
+                with metrics.timed('redis'):
+                    if self._pending_bump:
+                        # A bump was lost while Redis was down; fragments cached before it are stale
+                        self.client.incr(DATA_VERSION_KEY)
+                        self._pending_bump = False
+                    return int(self.client.get(DATA_VERSION_KEY) or 0)
+            except redis.RedisError as e:
+                self.redis_failed(e)
+        # A bump only reaches the worker that made it; the time window bounds how long
+        # the others keep serving fragments (and planner indexes) from before it
+        return f'local{self._local_version}.{int(time.monotonic() // LOCAL_VERSION_TTL)}'
+
+    def bump_data_version(self):
+        """Invalidate every cached fragment by moving to a new data version."""
+        with self._lock:
+            self._local_version += 1
+        if self.redis_available():
+            try:
+                with metrics.timed('redis'):
+                    self.client.incr(DATA_VERSION_KEY)
+                return
+            except redis.RedisError as e:
+                self.redis_failed(e)
+        self._pending_bump = True
+
+    def get(self, key):
+        if self.redis_available():
+            try:
+                with metrics.timed('redis'):
+                    value = self.client.get(RENDER_CACHE_PREFIX + key)
+                return value.decode('utf-8') if value is not None else None
+            except redis.RedisError as e:
+                self.redis_failed(e)
+        return self.local.get(key)
+
+    def set(self, key, value):
+        if self.redis_available():
+            try:
+                with metrics.timed('redis'):
+                    self.client.set(RENDER_CACHE_PREFIX + key, value.encode('utf-8'), ex=RENDER_CACHE_TTL)
+                return
+            except redis.RedisError as e:
+                self.redis_failed(e)
+        self.local.set(key, value)
+
+
+render_cache = RenderCache(redis_client)
+
+
+def bump_data_version():
+    """Mark the games catalogue, votes or members as changed."""
+    render_cache.bump_data_version()
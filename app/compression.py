@@ -0,0 +1,64 @@
+# app/compression.py
+"""Compress dynamic responses.
+
+Pages and JSON go out with gzip, or with Brotli when the brotli package is
+installed and the browser accepts it. Static files are left alone: they are
+sent as files (see app.assets for their precompressed variants). So are
+streams like the vote event feed, responses that are already encoded, and
+bodies too small to gain from it.
+"""
+import gzip
+from flask import request
+from .assets import brotli
+
+MIN_SIZE = 500  # Bytes; smaller bodies barely shrink and are not worth the CPU
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # The higher levels are for build-time compression; these are close to gzip's speed
+COMPRESSIBLE_MIMETYPES = ('text/html', 'text/plain', 'text/css', 'text/javascript', 'application/javascript', 'application/json')
+
+
+def choose_encoding(accept_encodings):
+    """Return the best encoding the client accepts, or None."""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response, accept_encodings):
+    """Compress the body of a buffered response in place, if it is worth it."""
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    data = response.get_data()
+    if len(data) < MIN_SIZE:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = choose_encoding(accept_encodings)
+    if encoding is None:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # The bytes differ from the uncompressed representation, so a strong ETag would be wrong
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_app(app):
+    if not app.config['COMPRESS_RESPONSES']:
+        return
+
+    @app.after_request
+    def compress_after_request(response):
+        return compress_response(response, request.accept_encodings)
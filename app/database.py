@@ -0,0 +1,43 @@
+# app/database.py
+import logging
+import sqlite3
+from sqlalchemy import event
+from .extensions import db
+
+# Applied to every new SQLite connection when SQLITE_WAL is on
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',  # Readers see the last commit while a write is in progress
+    'PRAGMA synchronous=NORMAL',  # Safe with WAL: a power cut can lose the last commits, never corrupt
+    'PRAGMA cache_size=-20000',  # 20 MB page cache per connection
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=134217728',  # Read the first 128 MB of the file through mmap
+)
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def init_app(app):
+    """Tune SQLite connections: WAL lets readers carry on while the sync writes.
+
+    Server databases get their pool settings from SQLALCHEMY_ENGINE_OPTIONS in
+    config.py instead.
+    """
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    if engine.url.database in (None, '', ':memory:'):
+        return  # WAL needs a database file
+    if not app.config['SQLITE_WAL']:
+        logging.info("SQLite WAL is disabled; readers will wait while the sync writes.")
+        return
+    event.listen(engine, 'connect', set_sqlite_pragmas)
@@ -0,0 +1,107 @@
+# app/events.py
+"""Live vote updates for open games pages, pushed as Server-Sent Events.
+
+The vote route publishes each change on a Redis pub/sub channel, so a stream
+served by any gunicorn worker sees votes cast through every other worker.
+Each event also goes into a short replay buffer (a sorted set keyed by event
+ID) so a browser that reconnects with Last-Event-ID receives what it missed.
+If it missed more than the buffer holds, it is told to reload instead.
+
+Streams only talk to Redis: they run after the request context, and with it
+the database session, has been torn down.
+"""
+import json
+import logging
+import time
+import redis
+from .cache import render_cache
+from .extensions import redis_client
+
+EVENT_CHANNEL = 'bgc:events:votes'
+EVENT_SEQUENCE_KEY = 'bgc:events:seq'
+EVENT_LOG_KEY = 'bgc:events:log'
+REPLAY_SIZE = 200  # Events kept for browsers reconnecting with Last-Event-ID
+HEARTBEAT_INTERVAL = 15  # Seconds between comments that keep idle connections and proxies alive
+RECONNECT_DELAY = 3000  # Milliseconds the browser waits before reconnecting
+REDIS_DOWN_RECONNECT_DELAY = 30000  # Reconnect delay sent when Redis is unreachable
+STREAM_MAX_SECONDS = 10 * 60  # Streams are closed after this long; the browser reconnects and resumes
+
+
+def publish_vote(state):
+    """Broadcast a game's new vote count and voters to every open stream.
+
+    state holds game_id, vote_count and voters. Failures are logged and
+    ignored: live updates are a convenience and must never fail a vote, nor
+    slow it down, so nothing is published while the render cache is backing
+    off after a Redis outage.
+    """
+    if not render_cache.redis_available():
+        return
+    event = {key: state[key] for key in ('game_id', 'vote_count', 'voters')}
+    try:
+        event_id = redis_client.incr(EVENT_SEQUENCE_KEY)
+        payload = json.dumps({'id': event_id, **event})
+        pipe = redis_client.pipeline()
+        pipe.zadd(EVENT_LOG_KEY, {payload: event_id})
+        pipe.zremrangebyrank(EVENT_LOG_KEY, 0, -REPLAY_SIZE - 1)
+        pipe.publish(EVENT_CHANNEL, payload)
+        pipe.execute()
+    except redis.RedisError as e:
+        logging.warning(f"Could not publish vote update: {e}")
+        render_cache.redis_failed(e)
+
+
+def format_event(payload):
+    """Format a published payload as an SSE 'vote' event."""
+    event = json.loads(payload)
+    return event['id'], f"id: {event['id']}\nevent: vote\ndata: {json.dumps(event)}\n\n"
+
+
+def missed_events(last_event_id):
+    """Return (events, complete, latest_id) for events after last_event_id from the replay buffer.
+
+    complete is False when older events than the buffer holds were missed.
+    """
+    payloads = redis_client.zrangebyscore(EVENT_LOG_KEY, f'({last_event_id}', '+inf')
+    oldest = redis_client.zrange(EVENT_LOG_KEY, 0, 0, withscores=True)
+    latest = int(redis_client.get(EVENT_SEQUENCE_KEY) or 0)
+    # A sequence behind the browser means Redis lost its data, so IDs are being reused
+    complete = (not oldest or oldest[0][1] <= last_event_id + 1) and last_event_id <= latest
+    return [format_event(payload) for payload in payloads], complete, latest
+
+
+def vote_stream(last_event_id=None):
+    """Yield the SSE stream for one browser, starting after last_event_id if given."""
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    try:
+        # Subscribe before replaying so nothing published in between is lost
+        pubsub.subscribe(EVENT_CHANNEL)
+        sent = last_event_id or 0
+        yield f"retry: {RECONNECT_DELAY}\n\n"
+        if last_event_id is not None:
+            replay, complete, latest = missed_events(last_event_id)
+            if not complete:
+                # Too much was missed to replay; carry on from the latest ID so the browser
+                # does not ask for the same gap again on its next reconnect
+                sent = latest
+                yield f"id: {latest}\nevent: reload\ndata: {{}}\n\n"
+                replay = []
+            for event_id, event in replay:
+                sent = event_id
+                yield event
+
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        while time.monotonic() < deadline:
+            message = pubsub.get_message(timeout=HEARTBEAT_INTERVAL)
+            if message is None:
+                yield ": heartbeat\n\n"
+                continue
+            event_id, event = format_event(message['data'])
+            if event_id > sent:  # Already sent from the replay buffer otherwise
+                sent = event_id
+                yield event
+    except redis.RedisError as e:
+        logging.warning(f"Vote stream closed, Redis unavailable: {e}")
+        yield f"retry: {REDIS_DOWN_RECONNECT_DELAY}\n\n"
+    finally:
+        pubsub.close()
@@ -1,26 +1,59 @@
 # app/extensions.py
 
+import threading
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_wtf import CSRFProtect
 import os
 import redis
+from .bgg_http import BGGClient
 
 db = SQLAlchemy()
-migrate = Migrate()
 login = LoginManager()
 login.login_view = 'main.login'  # Redirects to login page if not authenticated
 
-# Configure Redis connection (if using Flask-Limiter with Redis)
-redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379')
-redis_client = redis.Redis.from_url(redis_url)
 
-limiter = Limiter(
-    key_func=get_remote_address,
-    storage_uri=redis_url
-)
+class LazyRedis:
+    """Redis client that is only created on first use.
 
-csrf = CSRFProtect() 
+    Importing the app opens no connections, and a client first used in a
+    forked gunicorn worker belongs to that worker. The URL comes from
+    REDIS_URL in the app config once init_app has run, and from the
+    environment before that.
+    """
+
+    def __init__(self):
+        self.url = None
+        self._client = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        with self._lock:
+            self.url = app.config['REDIS_URL']
+            self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    url = self.url or os.getenv('REDIS_URL', 'redis://localhost:6379')
+                    # Fail fast when Redis is unreachable; callers fall back to local state
+                    self._client = redis.Redis.from_url(url, socket_connect_timeout=2)
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+redis_client = LazyRedis()
+
+# Storage comes from RATELIMIT_STORAGE_URI in the config; nothing connects until a limit is checked
+limiter = Limiter(key_func=get_remote_address)
+
+csrf = CSRFProtect()
+
+# Pooled, rate-limited HTTP client shared by every BGG sync worker
+bgg_client = BGGClient()
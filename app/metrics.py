@@ -0,0 +1,322 @@
+# app/metrics.py
+"""In-process metrics exposed in the Prometheus text format.
+
+Collected when METRICS_ENABLED is set:
+
+- HTTP requests: count and duration per endpoint, with the time split into
+  phases (sql, render, redis and the remaining app time) and the number of
+  SQL queries each request ran.
+- SQL: duration of every query, inside or outside a request.
+- BGG: latency per API endpoint, outcomes, retries, 429s and 202s.
+- Sync: duration and outcome of each run, and per-member collection size,
+  linked/unlinked games and failures.
+
+Metrics live in the process that records them. The web app serves its own at
+/metrics and sync_worker.py can serve the sync metrics on a separate port;
+both require METRICS_TOKEN as a bearer token. With gunicorn every worker
+keeps its own counters, so scrape each worker or run a single one.
+
+When metrics are disabled no hooks are installed and the recording helpers
+return after a single flag check.
+"""
+import hmac
+import threading
+import time
+from contextlib import nullcontext
+from bisect import bisect_left
+from flask import before_render_template, template_rendered, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+BGG_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SYNC_BUCKETS = (1, 10, 30, 60, 300, 600, 1800, 3600, 7200)
+
+enabled = False
+_registry = []
+_hooks_installed = False
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Metric:
+    """A named metric with optional labels; values are kept per label combination."""
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels[name] for name in self.labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, (), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for name, key, extra, value in self.samples():
+            lines.append(f'{name}{_format_labels(self.labels, key, extra)} {value}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=REQUEST_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in sorted(self._values.items())]
+        samples = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                samples.append((f'{self.name}_bucket', key, (('le', bound),), cumulative))
+            samples.append((f'{self.name}_sum', key, (), total))
+            samples.append((f'{self.name}_count', key, (), cumulative))
+        return samples
+
+
+http_requests = Counter('bgc_http_requests_total', 'HTTP requests handled.', ('endpoint', 'method', 'status'))
+http_duration = Histogram('bgc_http_request_duration_seconds', 'Time spent handling a request.', ('endpoint',))
+http_phase = Histogram(
+    'bgc_http_request_phase_seconds', 'Time spent per request in each phase (sql, render, redis, app).',
+    ('endpoint', 'phase')
+)
+http_queries = Histogram(
+    'bgc_http_request_sql_queries', 'SQL queries run per request.', ('endpoint',), buckets=QUERY_COUNT_BUCKETS
+)
+sql_duration = Histogram(
+    'bgc_sql_query_duration_seconds', 'Duration of SQL queries.', ('context',), buckets=QUERY_BUCKETS
+)
+bgg_duration = Histogram(
+    'bgc_bgg_request_duration_seconds', 'BGG API call latency, including retries and queue polls.',
+    ('endpoint',), buckets=BGG_BUCKETS
+)
+bgg_requests = Counter('bgc_bgg_requests_total', 'BGG API calls by outcome.', ('endpoint', 'outcome'))
+bgg_retries = Counter('bgc_bgg_retries_total', 'BGG API retries.', ('endpoint',))
+bgg_rate_limited = Counter('bgc_bgg_rate_limited_total', 'BGG API 429 replies.', ('endpoint',))
+bgg_queued = Counter('bgc_bgg_queued_total', 'BGG API 202 (request queued) replies.', ('endpoint',))
+sync_duration = Histogram('bgc_sync_duration_seconds', 'Duration of BGG sync runs.', ('kind',), buckets=SYNC_BUCKETS)
+sync_runs = Counter('bgc_sync_runs_total', 'BGG sync runs by outcome.', ('kind', 'outcome'))
+sync_last_success = Gauge('bgc_sync_last_success_timestamp_seconds', 'Unix time of the last successful sync.', ('kind',))
+sync_details = Counter('bgc_sync_game_details_fetched_total', 'Game details fetched from BGG.')
+sync_thumbnails = Counter('bgc_sync_thumbnails_cached_total', 'Thumbnails downloaded into the local cache.')
+sync_user_games = Gauge('bgc_sync_user_games', "Games in the member's BGG collection at the last sync.", ('user',))
+sync_user_items = Counter(
+    'bgc_sync_user_items_total', 'Ownership links added (linked) or removed (unlinked) per member.', ('user', 'kind')
+)
+sync_user_failures = Counter('bgc_sync_user_failures_total', 'Failed collection syncs per member.', ('user',))
+
+
+def render():
+    """Return every metric in the Prometheus text format."""
+    return '\n'.join(metric.render() for metric in _registry) + '\n'
+
+
+def authorized(header, token):
+    """Check an Authorization header against the configured bearer token."""
+    if not token or not header or not header.startswith('Bearer '):
+        return False
+    return hmac.compare_digest(header[len('Bearer '):].encode('utf-8'), token.encode('utf-8'))
+
+
+# Per-request state lives on flask.g: start time, accumulated phase times and the query count
+
+def _start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_phases = {'sql': 0.0, 'render': 0.0, 'redis': 0.0}
+    g.metrics_queries = 0
+    g.metrics_render_depth = 0
+
+
+def _finish_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    endpoint = request.endpoint or 'unmatched'
+    phases = g.metrics_phases
+    http_requests.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    http_duration.observe(elapsed, endpoint=endpoint)
+    http_queries.observe(g.metrics_queries, endpoint=endpoint)
+    for phase, seconds in phases.items():
+        http_phase.observe(seconds, endpoint=endpoint, phase=phase)
+    http_phase.observe(max(0.0, elapsed - sum(phases.values())), endpoint=endpoint, phase='app')
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    in_request = has_request_context() and 'metrics_phases' in g
+    sql_duration.observe(elapsed, context='request' if in_request else 'background')
+    if in_request:
+        g.metrics_phases['sql'] += elapsed
+        g.metrics_queries += 1
+
+
+def _before_render(sender, template, context, **extra):
+    if 'metrics_phases' in g:
+        if g.metrics_render_depth == 0:
+            g.metrics_render_started = time.perf_counter()
+        g.metrics_render_depth += 1
+
+
+def _after_render(sender, template, context, **extra):
+    if 'metrics_phases' in g and g.metrics_render_depth:
+        g.metrics_render_depth -= 1
+        if g.metrics_render_depth == 0:
+            g.metrics_phases['render'] += time.perf_counter() - g.metrics_render_started
+
+
+class _PhaseTimer:
+    __slots__ = ('phase', 'started')
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        g.metrics_phases[self.phase] += time.perf_counter() - self.started
+
+
+_NULL_TIMER = nullcontext()
+
+
+def timed(phase):
+    """Context manager adding the enclosed time to a phase of the current request.
+
+    Returns a shared no-op context manager when metrics are off or outside a request.
+    """
+    if not enabled or not has_request_context() or 'metrics_phases' not in g:
+        return _NULL_TIMER
+    return _PhaseTimer(phase)
+
+
+def observe_bgg(endpoint, latency, attempts, retries, rate_limited, queued, failed):
+    if not enabled:
+        return
+    bgg_duration.observe(latency, endpoint=endpoint)
+    bgg_requests.inc(endpoint=endpoint, outcome='failed' if failed else 'ok')
+    if retries:
+        bgg_retries.inc(retries, endpoint=endpoint)
+    if rate_limited:
+        bgg_rate_limited.inc(rate_limited, endpoint=endpoint)
+    if queued:
+        bgg_queued.inc(queued, endpoint=endpoint)
+
+
+def observe_sync(kind, seconds, synced=None, failed=(), details_fetched=0, thumbnails=0, error=None):
+    """Record a finished sync run.
+
+    kind is 'all' for club-wide syncs, 'members' for syncs of selected members
+    (e.g. after an import) and 'user' for single-member ones, synced maps member names to their counters and failed lists the members
+    whose collection could not be synced. error marks the whole run as failed.
+    """
+    if not enabled:
+        return
+    sync_duration.observe(seconds, kind=kind)
+    sync_runs.inc(kind=kind, outcome='failed' if error else 'succeeded')
+    for name in failed:
+        sync_user_failures.inc(user=name)
+    if error:
+        return
+    sync_last_success.set(time.time(), kind=kind)
+    sync_details.inc(details_fetched)
+    sync_thumbnails.inc(thumbnails)
+    for name, stats in (synced or {}).items():
+        sync_user_games.set(stats['games'], user=name)
+        sync_user_items.inc(stats['linked'], user=name, kind='linked')
+        sync_user_items.inc(stats['unlinked'], user=name, kind='unlinked')
+
+
+def wsgi_app(token):
+    """A minimal WSGI app serving render() at /metrics, for processes without a web app."""
+    def application(environ, start_response):
+        if environ.get('PATH_INFO') != '/metrics':
+            start_response('404 Not Found', [('Content-Type', 'text/plain')])
+            return [b'Not Found']
+        if not authorized(environ.get('HTTP_AUTHORIZATION'), token):
+            start_response('401 Unauthorized', [('Content-Type', 'text/plain'), ('WWW-Authenticate', 'Bearer')])
+            return [b'Unauthorized']
+        start_response('200 OK', [('Content-Type', CONTENT_TYPE)])
+        return [render().encode('utf-8')]
+    return application
+
+
+def init_app(app):
+    """Install the request, SQL and template hooks if METRICS_ENABLED is set."""
+    global enabled, _hooks_installed
+    enabled = app.config.get('METRICS_ENABLED', False)
+    if not enabled:
+        return
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+    if not _hooks_installed:
+        # Listening on the Engine class covers every engine, including ones created later
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _hooks_installed = True
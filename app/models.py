@@ -1,33 +1,68 @@
 # app/models.py
+from functools import lru_cache
+from flask import current_app
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from .extensions import db
 
+DEFAULT_PASSWORD_HASH_METHOD = 'scrypt'
+
+
+def password_hash_method():
+    """The werkzeug method new password hashes use, from PASSWORD_HASH_METHOD."""
+    return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_PASSWORD_HASH_METHOD)
+
+
+@lru_cache(maxsize=8)
+def hash_prefix(method):
+    """The method and parameters werkzeug writes before the salt, e.g. 'scrypt:32768:8:1'."""
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
 # Association table for votes
 votes = db.Table('votes',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('game_id', db.Integer, db.ForeignKey('game.id'), primary_key=True)
+    db.Column('game_id', db.Integer, db.ForeignKey('game.id'), primary_key=True),
+    # The primary key serves lookups by user; this one serves the voters of a game
+    db.Index('ix_votes_game_id_user_id', 'game_id', 'user_id')
 )
 
 # Association table for game ownership
 user_games = db.Table('user_games',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('game_id', db.Integer, db.ForeignKey('game.id'), primary_key=True)
+    db.Column('game_id', db.Integer, db.ForeignKey('game.id'), primary_key=True),
+    # Owners of a game, and the orphan check in app.bgg.delete_orphan_games
+    db.Index('ix_user_games_game_id_user_id', 'game_id', 'user_id')
+)
+
+# Association table for the categories, mechanics and designers of a game
+game_tags = db.Table('game_tags',
+    db.Column('game_id', db.Integer, db.ForeignKey('game.id'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True),
+    # Games with a tag, for the /api/games filters
+    db.Index('ix_game_tags_tag_id_game_id', 'tag_id', 'game_id')
 )
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), nullable=False, unique=True)
     bgg_username = db.Column(db.String(150), nullable=False, unique=True)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)
+    # Set while the password is still the initial one (the BGG username). NULL for
+    # members added before the flag existed until their next login fills it in.
+    must_reset_password = db.Column(db.Boolean)
     votes = db.relationship('Game', secondary=votes, backref=db.backref('voters', lazy='dynamic'), lazy='dynamic')
     owned_games = db.relationship('Game', secondary=user_games, backref=db.backref('owners', lazy='dynamic'), lazy='dynamic')
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=password_hash_method())
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """True if the hash was made with another method or parameters than new hashes use."""
+        return self.password_hash.split('$', 1)[0] != hash_prefix(password_hash_method())
     
     def vote_count(self):
         return self.votes.count()
@@ -35,13 +70,35 @@ class User(UserMixin, db.Model):
 class Game(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     bgg_id = db.Column(db.Integer, unique=True, nullable=False)
-    name = db.Column(db.String(250), nullable=False)
+    name = db.Column(db.String(250), nullable=False, index=True)
     thumbnail = db.Column(db.String(500))
-    min_players = db.Column(db.Integer)
-    max_players = db.Column(db.Integer)
-    playing_time = db.Column(db.Integer)
-    difficulty = db.Column(db.String(50))
+    # Local copy of the thumbnail, see app.thumbnails: content hash and the URL it was downloaded from
+    thumbnail_hash = db.Column(db.String(64))
+    thumbnail_source = db.Column(db.String(500))
+    thumbnail_failed_at = db.Column(db.DateTime)  # Last failed download of thumbnail_source, for the retry back-off
+    # Indexed for the /api/games filters
+    min_players = db.Column(db.Integer, index=True)
+    max_players = db.Column(db.Integer, index=True)
+    playing_time = db.Column(db.Integer, index=True)
+    weight = db.Column(db.Float, index=True)  # BGG average weight, 1 (light) to 5 (heavy)
+    rating = db.Column(db.Float)  # BGG average rating, 1 to 10
+    details_fetched_at = db.Column(db.DateTime)  # When the details above were last fetched from BGG
+    # Denormalized number of rows in votes for this game, maintained by app.votes
+    vote_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    tags = db.relationship('Tag', secondary=game_tags, backref=db.backref('games', lazy='dynamic'), lazy='dynamic')
 
-    @property
-    def vote_count(self):
-        return self.voters.count()
+    __table_args__ = (
+        db.Index('ix_game_vote_count_id', vote_count.desc(), id),  # Index ordering by votes
+    )
+
+class Tag(db.Model):
+    """A BGG category, mechanic or designer, shared by every game that has it."""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # One of app.bgg.TAG_KINDS' values
+    bgg_id = db.Column(db.Integer, nullable=False)
+    name = db.Column(db.String(250), nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'bgg_id', name='uq_tag_kind_bgg_id'),
+        db.Index('ix_tag_kind_name', 'kind', 'name'),
+    )
@@ -0,0 +1,168 @@
+# app/planner.py
+""""What can we play tonight": the games a group can play, from an in-memory index.
+
+Games are numbered by rank (most votes first, as on the index page), and
+every set of games is a Python int with bit N set for game N:
+
+- one ownership bitset per member
+- cumulative bitsets over the sorted distinct min_players, max_players and
+  playing_time values, so "min_players <= n" is one bisect and one lookup
+
+A plan is then the OR of the attendees' bitsets ANDed with three lookups,
+and its games are read lowest bit first, which is best ranked first.
+
+The index is rebuilt from three queries whenever the data version changes,
+i.e. after a sync, a vote or a membership change. Until a rebuild finishes,
+other requests keep answering from the previous index.
+"""
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from sqlalchemy import String, cast, func, select
+from .cache import render_cache
+from .models import db, Game, User, user_games
+
+PLAN_LIMIT = 20
+MAX_PLAN_LIMIT = 100
+
+
+def bitset(positions, size):
+    """Return an int with the given bit positions set."""
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def cumulative(values, size, descending=False):
+    """Return (keys, bitsets) for a list of per-game values, None meaning unknown.
+
+    keys are the distinct values in ascending order. bitsets[i] holds the
+    games whose value is <= keys[i], or >= keys[i] with descending.
+    """
+    by_value = defaultdict(list)
+    for position, value in enumerate(values):
+        if value is not None:
+            by_value[value].append(position)
+    keys = sorted(by_value)
+    bitsets = [0] * len(keys)
+    running = 0
+    for i in (reversed(range(len(keys))) if descending else range(len(keys))):
+        running |= bitset(by_value[keys[i]], size)
+        bitsets[i] = running
+    return keys, bitsets
+
+
+def iter_bits(bits):
+    """Yield the positions of the set bits, lowest first."""
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+def at_most(keys, bitsets, value):
+    """Bitset of games whose value is <= value."""
+    i = bisect_right(keys, value)
+    return bitsets[i - 1] if i else 0
+
+
+def at_least(keys, bitsets, value):
+    """Bitset of games whose value is >= value."""
+    i = bisect_left(keys, value)
+    return bitsets[i] if i < len(bitsets) else 0
+
+
+class PlannerIndex:
+    def __init__(self, version, game_ids, members, owned, min_players, max_players, playing_time):
+        self.version = version
+        self.game_ids = game_ids  # By rank
+        self.members = members  # Lower-cased name -> (user ID, name)
+        self.owned = owned  # User ID -> bitset
+        self.min_keys, self.min_at_most = min_players
+        self.max_keys, self.max_at_least = max_players
+        self.time_keys, self.time_at_most = playing_time
+
+    @classmethod
+    def build(cls, version):
+        games = db.session.execute(
+            select(Game.id, Game.min_players, Game.max_players, Game.playing_time)
+            .order_by(Game.vote_count.desc(), Game.id)
+        ).all()
+        size = len(games)
+        position = {game.id: i for i, game in enumerate(games)}
+        # One row per member rather than per owned game: fetching rows dominates the build
+        owned_games = db.session.execute(
+            select(user_games.c.user_id, func.aggregate_strings(cast(user_games.c.game_id, String), ','))
+            .group_by(user_games.c.user_id)
+        ).all()
+        members = {name.lower(): (user_id, name) for user_id, name in db.session.execute(select(User.id, User.name))}
+        return cls(
+            version,
+            [game.id for game in games],
+            members,
+            {user_id: bitset((position[int(game_id)] for game_id in game_ids.split(',')), size)
+             for user_id, game_ids in owned_games},
+            cumulative([game.min_players for game in games], size),
+            cumulative([game.max_players for game in games], size, descending=True),
+            # BGG reports 0 minutes when the playing time is unknown
+            cumulative([game.playing_time or None for game in games], size),
+        )
+
+    def find_members(self, names):
+        """Return ({user ID: name} for the names found, [names not found]), ignoring case."""
+        found, unknown = {}, []
+        for name in names:
+            member = self.members.get(name.strip().lower())
+            if member:
+                found[member[0]] = member[1]
+            else:
+                unknown.append(name)
+        return found, unknown
+
+    def plan(self, attendee_ids, players, max_time=None, limit=PLAN_LIMIT):
+        """Return (matches, total) for the games an attendee owns that fit, best ranked first.
+
+        matches holds up to limit (game ID, IDs of the attendees owning it)
+        pairs, total counts every fitting game. Games fit when min_players <=
+        players <= max_players and, given a max_time, playing_time <= max_time.
+        Games with an unknown player count, or an unknown playing time when
+        max_time is given, do not fit.
+        """
+        owned = {user_id: self.owned.get(user_id, 0) for user_id in attendee_ids}
+        bits = 0
+        for games in owned.values():
+            bits |= games
+        bits &= at_most(self.min_keys, self.min_at_most, players)
+        bits &= at_least(self.max_keys, self.max_at_least, players)
+        if max_time is not None:
+            bits &= at_most(self.time_keys, self.time_at_most, max_time)
+        matches = []
+        for position in iter_bits(bits):
+            if len(matches) == limit:
+                break
+            owners = [user_id for user_id, games in owned.items() if games >> position & 1]
+            matches.append((self.game_ids[position], owners))
+        return matches, bits.bit_count()
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index():
+    """Return the planner index for the current data version, rebuilding it if needed."""
+    global _index
+    version = render_cache.data_version()
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    # While one request rebuilds, the others answer from the previous index rather than wait
+    if not _lock.acquire(blocking=index is None):
+        return index
+    try:
+        if _index is None or _index.version != version:
+            _index = PlannerIndex.build(version)
+        return _index
+    finally:
+        _lock.release()
@@ -0,0 +1,131 @@
+# app/queries.py
+import base64
+import json
+from sqlalchemy import and_, or_, select
+from .models import db, Game, Tag, User, game_tags, user_games, votes
+
+PAGE_SIZE = 48  # Games per page on the index and the default for /api/games
+MAX_PAGE_SIZE = 200
+SORTS = ('votes', 'name')
+TAG_FILTERS = ('category', 'mechanic', 'designer')
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, sort='votes'):
+    """Decode a cursor produced by encode_cursor for the given sort, raising ValueError if it is malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+    if not isinstance(values, list) or len(values) != 2 or not is_int(values[1]):
+        raise ValueError('Invalid cursor')
+    # The sort key is compared with a column, so it must have that column's type
+    if not (is_int(values[0]) if sort == 'votes' else isinstance(values[0], str)):
+        raise ValueError('Invalid cursor')
+    return values
+
+
+def is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def games_page(sort='votes', cursor=None, limit=PAGE_SIZE,
+               min_players=None, max_players=None, max_time=None, owner=None,
+               min_weight=None, max_weight=None, tags=None):
+    """Return one page of games as (rows, next_cursor) using keyset pagination.
+
+    rows is a list of Game instances. Games are ordered by votes
+    (descending) or name, with the game ID as tie-breaker so that the cursor,
+    which holds the last row's sort key and ID, identifies a unique position.
+
+    Filters: min_players keeps games that seat at least that many players,
+    max_players keeps games playable with that many or fewer, max_time keeps
+    games no longer than that many minutes and owner keeps games owned by the
+    member with that name. min_weight and max_weight bound the BGG weight, and
+    tags, a list of (kind, name) pairs such as ('mechanic', 'Deck Building'),
+    keeps games that have every one of them.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"Unknown sort '{sort}'")
+
+    query = select(Game)
+
+    if min_players is not None:
+        query = query.where(Game.max_players >= min_players)
+    if max_players is not None:
+        query = query.where(Game.min_players <= max_players)
+    if max_time is not None:
+        query = query.where(Game.playing_time <= max_time)
+    if owner:
+        query = query.where(Game.id.in_(
+            select(user_games.c.game_id).join(User, User.id == user_games.c.user_id).where(User.name == owner)
+        ))
+    if min_weight is not None:
+        query = query.where(Game.weight >= min_weight)
+    if max_weight is not None:
+        query = query.where(Game.weight <= max_weight)
+    for kind, name in tags or ():
+        query = query.where(Game.id.in_(
+            select(game_tags.c.game_id).join(Tag, Tag.id == game_tags.c.tag_id).where(Tag.kind == kind, Tag.name == name)
+        ))
+
+    if sort == 'votes':
+        sort_key = Game.vote_count
+        order_by = (Game.vote_count.desc(), Game.id.asc())
+    else:
+        sort_key = Game.name
+        order_by = (Game.name.asc(), Game.id.asc())
+
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, sort)
+        after_key = sort_key < last_key if sort == 'votes' else sort_key > last_key
+        query = query.where(or_(after_key, and_(sort_key == last_key, Game.id > last_id)))
+
+    rows = db.session.execute(query.order_by(*order_by).limit(limit + 1)).scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        game = rows[-1]
+        next_cursor = encode_cursor([game.vote_count if sort == 'votes' else game.name, game.id])
+    return rows, next_cursor
+
+
+def voters_by_game(game_ids):
+    """Return a mapping of game ID to the sorted names of its voters, in one query."""
+    voters = {}
+    if not game_ids:
+        return voters
+    rows = db.session.execute(
+        select(votes.c.game_id, User.name)
+        .join(User, User.id == votes.c.user_id)
+        .where(votes.c.game_id.in_(game_ids))
+        .order_by(User.name)
+    )
+    for game_id, name in rows:
+        voters.setdefault(game_id, []).append(name)
+    return voters
+
+
+def tags_by_game(game_ids):
+    """Return a mapping of game ID to {kind: sorted tag names}, in one query."""
+    tags = {}
+    if not game_ids:
+        return tags
+    rows = db.session.execute(
+        select(game_tags.c.game_id, Tag.kind, Tag.name)
+        .join(Tag, Tag.id == game_tags.c.tag_id)
+        .where(game_tags.c.game_id.in_(game_ids))
+        .order_by(Tag.name)
+    )
+    for game_id, kind, name in rows:
+        tags.setdefault(game_id, {}).setdefault(kind, []).append(name)
+    return tags
+
+
+def voted_game_ids(user):
+    """Return the set of game IDs the user has voted for."""
+    return set(db.session.execute(select(votes.c.game_id).where(votes.c.user_id == user.id)).scalars())
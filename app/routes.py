@@ -1,21 +1,127 @@
 # app/routes.py
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+import re
+import os
+import hashlib
+import json
+import time
+from flask import Blueprint, Response, render_template, redirect, url_for, flash, request, abort, send_file, current_app, jsonify, session
 from flask_login import login_user, logout_user, current_user, login_required
-from sqlalchemy import func
-from .models import db, User, Game, votes
+from flask_wtf.csrf import CSRFError, generate_csrf
+from .models import db, User, Game
 from .forms import LoginForm, PasswordResetForm, VoteForm  
+from .cache import render_cache, bump_data_version
+from .queries import games_page, voters_by_game, voted_game_ids
+from .votes import MAX_VOTES, cast_vote, remove_vote
+from .sync import get_sync_status
+from .events import publish_vote, vote_stream
+from .thumbnails import THUMBNAIL_FORMATS, thumbnail_dir, thumbnail_path
+from . import metrics
 
 main = Blueprint('main', __name__)
 
+VOTE_STATE_PATTERN = re.compile(r'<!--vote-button:(\d+)-->|__CSRF_TOKEN__')
+DIGEST_PATTERN = re.compile(r'[0-9a-f]{64}')
+THUMBNAIL_MAX_AGE = 365 * 24 * 3600  # Thumbnail URLs are content-addressed, so they never change
+CSRF_ETAG_WINDOW_DIVISOR = 4  # Index ETags change every quarter of the CSRF token lifetime
+
+def build_games_view(cursor=None):
+    """Build one page of the games grid from a fixed number of queries.
+
+    Returns (entries, next_cursor): one entry per game, ordered by number of
+    votes, holding the game and the names of its voters, plus the cursor of
+    the next page, which the page script loads from /api/games and the
+    "Load more" link from the index. Raises ValueError for a bad cursor.
+    """
+    rows, next_cursor = games_page(sort='votes', cursor=cursor)
+    voters = voters_by_game([game.id for game in rows])
+    entries = [{'game': game, 'voters': voters.get(game.id, [])} for game in rows]
+    return entries, next_cursor
+
+def render_games_grid(show_votes, cursor=None):
+    """Return the user-independent games grid, rendering it only when the data version changed.
+
+    Only the first page is cached. Later ones are reached through the
+    "Load more" link by browsers without JavaScript, and are rendered each time.
+    """
+    if cursor:
+        games, next_cursor = build_games_view(cursor)
+        return render_template('_games_grid.html', games=games, next_cursor=next_cursor, show_votes=show_votes)
+    key = f"index:{render_cache.data_version()}:{current_app.config['ASSET_VERSION']}:{'members' if show_votes else 'public'}"
+    grid = render_cache.get(key)
+    if grid is None:
+        games, next_cursor = build_games_view()
+        grid = render_template('_games_grid.html', games=games, next_cursor=next_cursor, show_votes=show_votes)
+        render_cache.set(key, grid)
+    return grid
+
+def apply_vote_state(grid, voted_ids):
+    """Fill the per-user vote buttons and CSRF tokens into a cached games grid."""
+    buttons = {voted: render_template('_vote_button.html', voted=voted) for voted in (True, False)}
+    token = generate_csrf()
+
+    def substitute(match):
+        if match.group(1) is None:
+            return token
+        return buttons[int(match.group(1)) in voted_ids]
+
+    return VOTE_STATE_PATTERN.sub(substitute, grid)
+
+def index_etag(version, sync_status):
+    """Return the ETag of the index page as this member would get it now.
+
+    The page is fully determined by the data version, the static asset
+    version, the member, the page cursor, the sync status and the session's
+    CSRF token. The
+    signed token embeds the time it was issued, so the ETag also changes
+    every fraction of the token lifetime to keep a reused page from handing
+    out a token that is about to expire.
+    """
+    time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600)
+    window = int(time.time() // (time_limit // CSRF_ETAG_WINDOW_DIVISOR)) if time_limit else 0
+    raw_token = session.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'), '')
+    parts = [
+        version, current_app.config['ASSET_VERSION'],
+        current_user.get_id() if current_user.is_authenticated else 'anonymous', request.args.get('cursor', ''),
+        json.dumps(sync_status, sort_keys=True), window, raw_token,
+    ]
+    return hashlib.sha256('|'.join(map(str, parts)).encode('utf-8')).hexdigest()[:32]
+
 @main.route('/')
 def index():
-    # Order games by number of voters descending
-    games = Game.query.outerjoin(votes).group_by(Game.id).order_by(func.count(votes.c.user_id).desc()).all()
-    
-    # Create a dictionary of VoteForm instances keyed by game ID
-    vote_forms = {game.id: VoteForm(prefix=str(game.id)) for game in games}
-    
-    return render_template('games.html', games=games, vote_forms=vote_forms)
+    version = render_cache.data_version()
+    sync_status = get_sync_status()
+    # Pending flash messages make this page a one-off, so it must not be revalidated later
+    conditional = not session.get('_flashes')
+    if conditional:
+        etag = index_etag(version, sync_status)
+        # Only the ETag: a date cannot tell the member's own page from the one seen before logging in
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            set_index_validators(response, etag)
+            return response
+
+    # The shared grid comes from the render cache; only the member's own votes are queried
+    try:
+        grid = render_games_grid(show_votes=current_user.is_authenticated, cursor=request.args.get('cursor'))
+    except ValueError:
+        abort(400)
+    if current_user.is_authenticated:
+        grid = apply_vote_state(grid, voted_game_ids(current_user))
+
+    response = current_app.make_response(render_template('games.html', games_grid=grid, sync_status=sync_status))
+    if conditional:
+        # Rendering may have issued the session's first CSRF token
+        set_index_validators(response, index_etag(version, sync_status))
+    else:
+        response.cache_control.no_store = True
+    return response
+
+def set_index_validators(response, etag):
+    response.set_etag(etag, weak=True)
+    # Browsers keep the page but must ask before reusing it; only theirs, since it is per member
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
 
 @main.route('/login', methods=['GET', 'POST'])
 def login():
@@ -24,9 +130,17 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(name=form.username.data).first()
-        if user and user.check_password(form.password.data):
+        password = form.password.data
+        # The only password hash computed per login: the flag and the rehash work from the checked plain text
+        if user and user.check_password(password):
+            if user.must_reset_password is None:
+                user.must_reset_password = password == user.bgg_username
+            if user.password_needs_rehash():
+                user.set_password(password)
+            if db.session.dirty:
+                db.session.commit()
             login_user(user)
-            if user.check_password(user.bgg_username):
+            if user.must_reset_password:
                 flash('Please reset your password.')
                 return redirect(url_for('main.reset_password'))
             flash('Logged in successfully.')
@@ -48,31 +162,108 @@ def reset_password():
     form = PasswordResetForm()
     if form.validate_on_submit():
         current_user.set_password(form.password.data)
+        current_user.must_reset_password = False
         db.session.commit()
         flash('Your password has been updated.')
         return redirect(url_for('main.index'))
     return render_template('reset_password.html', form=form)
 
+def wants_json():
+    """True for fetch requests that asked for JSON rather than a redirect."""
+    return request.accept_mimetypes.best == 'application/json'
+
+def vote_state(game):
+    """The parts of a game card that change when the current member votes."""
+    voted_ids = voted_game_ids(current_user)
+    return {
+        'game_id': game.id,
+        'vote_count': game.vote_count,
+        'voters': voters_by_game([game.id]).get(game.id, []),
+        'voted': game.id in voted_ids,
+        'remaining_votes': max(MAX_VOTES - len(voted_ids), 0),
+    }
+
+@main.app_errorhandler(CSRFError)
+def csrf_error(e):
+    # Let the page script tell an expired token apart from other failures
+    if wants_json():
+        return jsonify(error=e.description), 400
+    return e
+
 @main.route('/vote/<int:game_id>', methods=['POST'])
 @login_required
 def vote(game_id):
+    """Toggle the member's vote for a game.
+
+    Browsers posting the form are redirected back to the index. Requests that
+    accept JSON (the page script) get the game's new vote state instead, so
+    only that card has to change. Both are CSRF-protected: the token comes from
+    the form field or the X-CSRFToken header.
+    """
     game = Game.query.get_or_404(game_id)
     
     # Instantiate the VoteForm with the correct prefix
     form = VoteForm(prefix=str(game_id))
     
+    status = 200
     if form.validate_on_submit():
-        if game in current_user.votes:
-            current_user.votes.remove(game)
-            flash(f'Your vote for "{game.name}" has been removed.')
+        if remove_vote(current_user.id, game.id):
+            message = f'Your vote for "{game.name}" has been removed.'
+        elif cast_vote(current_user.id, game.id):
+            message = f'You have voted for "{game.name}".'
         else:
-            if current_user.vote_count() >= 3:
-                flash('You have reached the maximum number of votes.')
-                return redirect(url_for('main.index'))
-            current_user.votes.append(game)
-            flash(f'You have voted for "{game.name}".')
-        db.session.commit()
+            message = 'You have reached the maximum number of votes.'
+            status = 409
+        if status == 200:
+            db.session.commit()
+            bump_data_version()
+            state = vote_state(game)
+            publish_vote(state)
     else:
+        if wants_json():
+            return jsonify(error='Invalid vote submission.'), 400
         flash('Invalid vote submission.')
-    
+        return redirect(url_for('main.index'))
+
+    if wants_json():
+        return jsonify(message=message, **(state if status == 200 else vote_state(game))), status
+    flash(message)
     return redirect(url_for('main.index'))
+
+@main.route('/events')
+@login_required
+def events():
+    """Stream vote updates to the games page as Server-Sent Events.
+
+    The stream is generated after the request context is gone, so it holds a
+    Redis subscription but no database connection.
+    """
+    response = Response(
+        vote_stream(request.headers.get('Last-Event-ID', type=int)), mimetype='text/event-stream'
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
+
+@main.route('/thumbnails/<digest>.<ext>')
+def thumbnail(digest, ext):
+    """Serve a locally cached thumbnail, falling back to the placeholder image."""
+    if ext not in THUMBNAIL_FORMATS or not DIGEST_PATTERN.fullmatch(digest):
+        abort(404)
+    path = thumbnail_path(thumbnail_dir(), digest, ext)
+    if not os.path.exists(path):
+        return send_file(os.path.join(current_app.static_folder, 'images', 'no-image.png'), max_age=300)
+
+    response = send_file(path, mimetype=THUMBNAIL_FORMATS[ext][1], etag=f'{digest}.{ext}', max_age=THUMBNAIL_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@main.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics for this process, for scrapers holding METRICS_TOKEN."""
+    if not metrics.enabled:
+        abort(404)
+    if not metrics.authorized(request.headers.get('Authorization'), current_app.config.get('METRICS_TOKEN')):
+        return Response('Unauthorized', 401, {'WWW-Authenticate': 'Bearer'})
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,182 @@
+# app/search.py
+"""Game search backed by the database's own text index.
+
+SQLite: an FTS5 table over game names. It is an external-content table, so
+names are stored once, in the game table. Triggers keep it in step with
+every write to the game table, including the sync's bulk inserts and
+deletes. Prefix indexes on two and three characters keep type-ahead queries
+cheap.
+
+Postgres: a pg_trgm GIN index on game.name serves the ILIKE queries.
+
+Other databases, or a SQLite build without FTS5, fall back to plain LIKE
+matching.
+
+db.create_all() creates the index with the game table. Alembic migrations
+do not, so setup.sh runs 'flask search-index' after 'flask db upgrade'
+('python admin_commands.py search-index' does the same). A SQLite database
+found without the index at the first search gets it built then, once per
+process.
+"""
+import logging
+import re
+import click
+from sqlalchemy import Float, Integer, case, event, select, text
+from sqlalchemy.exc import DBAPIError
+from .models import db, Game
+
+MIN_QUERY_LENGTH = 2  # Characters before a search is run
+SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+WORD_PATTERN = re.compile(r'\w+')
+
+SQLITE_INDEX_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS game_search USING fts5("
+    "name, content='game', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS game_search_insert AFTER INSERT ON game BEGIN "
+    "INSERT INTO game_search(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS game_search_delete AFTER DELETE ON game BEGIN "
+    "INSERT INTO game_search(game_search, rowid, name) VALUES ('delete', old.id, old.name); END",
+    # Only renames touch the index: detail refreshes write name too, mostly unchanged.
+    # Dropped first so 'flask search-index' replaces the trigger of older databases.
+    "DROP TRIGGER IF EXISTS game_search_update",
+    "CREATE TRIGGER game_search_update AFTER UPDATE OF name ON game WHEN old.name IS NOT new.name BEGIN "
+    "INSERT INTO game_search(game_search, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO game_search(rowid, name) VALUES (new.id, new.name); END",
+)
+POSTGRES_INDEX_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_game_name_trgm ON game USING gin (name gin_trgm_ops)",
+)
+
+SEARCH_INDEX_NAME = 'ix_game_name_trgm'
+
+_indexed_engines = set()  # Engines known to have the FTS table, so it is looked up once per process
+_build_attempted = set()  # Engines this process has tried to build a missing FTS table for
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Alembic filter: keep the search index, which the models do not describe, out of autogenerated migrations.
+
+    Without it 'flask db migrate' drops the FTS table (and its shadow tables)
+    while the triggers on game stay, and every later insert into game fails.
+    """
+    if type_ == 'table' and name.startswith('game_search'):
+        return False
+    if type_ == 'index' and name == SEARCH_INDEX_NAME:
+        return False
+    return True
+
+
+def index_ddl(dialect):
+    return {'sqlite': SQLITE_INDEX_DDL, 'postgresql': POSTGRES_INDEX_DDL}.get(dialect, ())
+
+
+def create_search_index(connection):
+    """Create the search index and its triggers if missing. Returns False if the database cannot have one."""
+    statements = index_ddl(connection.dialect.name)
+    try:
+        # A savepoint, as a failed statement aborts the whole transaction on Postgres
+        with connection.begin_nested():
+            for statement in statements:
+                connection.execute(text(statement))
+    except DBAPIError as e:
+        logging.warning(f"Search index not created, falling back to LIKE matching: {e}")
+        return False
+    return bool(statements)
+
+
+@event.listens_for(Game.__table__, 'after_create')
+def on_game_table_created(target, connection, **kw):
+    create_search_index(connection)
+
+
+@event.listens_for(Game.__table__, 'before_drop')
+def on_game_table_dropped(target, connection, **kw):
+    # The FTS table refers to game rows by ID, so it must not outlive them
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text("DROP TABLE IF EXISTS game_search"))
+    _indexed_engines.discard(connection.engine.url)
+
+
+def rebuild_search_index():
+    """Create the search index if missing and refill it from the game table, then commit.
+
+    Returns False if the database cannot have one.
+    """
+    connection = db.session.connection()
+    if not create_search_index(connection):
+        return False
+    if connection.dialect.name == 'sqlite':
+        db.session.execute(text("INSERT INTO game_search(game_search) VALUES ('rebuild')"))
+    db.session.commit()
+    _indexed_engines.discard(db.engine.url)
+    return True
+
+
+def init_app(app):
+    @app.cli.command('search-index')
+    def search_index_command():
+        """Create the game search index if missing and rebuild it."""
+        if rebuild_search_index():
+            click.echo("The game search index is up to date.")
+        else:
+            click.echo("This database has no text index; search falls back to LIKE matching.")
+
+
+def has_fts_index():
+    engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return False
+    if engine.url not in _indexed_engines:
+        found = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'game_search'")
+        ).first()
+        if not found:
+            if engine.url in _build_attempted:
+                return False  # Looked up again next time, in case the index has been built since
+            _build_attempted.add(engine.url)
+            logging.warning("Game search index missing, building it now. Run 'flask search-index' after migrations.")
+            if not rebuild_search_index():
+                return False
+        _indexed_engines.add(engine.url)
+    return True
+
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_games(query, limit=SEARCH_LIMIT):
+    """Return up to limit games whose name matches every word of query.
+
+    On SQLite each word matches the start of a word in the name ('cat' finds
+    'Catan' and 'Exploding Kittens: Cats'), elsewhere anywhere in the name.
+    Names starting with the query come first, then the closest matches, then
+    the most voted games.
+    """
+    words = WORD_PATTERN.findall(query.lower())
+    if len(''.join(words)) < MIN_QUERY_LENGTH:
+        return []
+
+    starts_with_query = case((Game.name.ilike(f"{escape_like(query.strip())}%", escape='\\'), 0), else_=1)
+    if has_fts_index():
+        match = ' '.join(f'"{word}"*' for word in words)
+        matches = (
+            text("SELECT rowid AS id, bm25(game_search) AS rank FROM game_search WHERE game_search MATCH :match")
+            .bindparams(match=match)
+            .columns(id=Integer, rank=Float)
+            .subquery()
+        )
+        statement = (
+            select(Game)
+            .join(matches, matches.c.id == Game.id)
+            .order_by(starts_with_query, matches.c.rank, Game.vote_count.desc(), Game.id)
+        )
+    else:
+        statement = (
+            select(Game)
+            .where(*(Game.name.ilike(f"%{escape_like(word)}%", escape='\\') for word in words))
+            .order_by(starts_with_query, Game.vote_count.desc(), Game.name, Game.id)
+        )
+    return db.session.execute(statement.limit(limit)).scalars().all()
@@ -1,28 +1,265 @@
 // app/static/js/scripts.js
 
+const showToast = message => {
+    const toastContainer = document.getElementById('toast-container');
+    const toastEl = document.createElement('div');
+    toastEl.className = 'toast align-items-center text-bg-info border-0';
+    toastEl.role = 'alert';
+    toastEl.ariaLive = 'assertive';
+    toastEl.ariaAtomic = 'true';
+    toastEl.innerHTML = `
+        <div class="d-flex">
+            <div class="toast-body"></div>
+            <button type="button" class="btn-close btn-close-white me-2 m-auto" data-bs-dismiss="toast" aria-label="Close"></button>
+        </div>
+    `;
+    toastEl.querySelector('.toast-body').textContent = message;
+    toastContainer.appendChild(toastEl);
+    const toast = new bootstrap.Toast(toastEl);
+    toast.show();
+};
+
+// Vote state of a card; shared by cards loaded from /api/games and updates after a vote
+const setVoteButton = (button, voted) => {
+    button.classList.toggle('btn-danger', voted);
+    button.classList.toggle('btn-primary', !voted);
+    button.setAttribute('aria-label', voted ? 'Undo Vote' : 'Vote');
+    button.innerHTML = voted
+        ? '<i class="fas fa-undo"></i> Undo Vote'
+        : '<i class="fas fa-thumbs-up"></i> Vote';
+};
+
+const setVoters = (container, voters) => {
+    const list = container.querySelector('ul');
+    list.replaceChildren(...voters.map(name => {
+        const item = document.createElement('li');
+        item.innerHTML = '<i class="fas fa-user"></i> ';
+        item.append(name);
+        return item;
+    }));
+    container.classList.toggle('d-none', voters.length === 0);
+};
+
+// Count and voters are the same for everyone; the button reflects the member's own vote
+const applyVoteCount = (card, state) => {
+    card.querySelector('[data-field="vote_count"]').textContent = state.vote_count;
+    setVoters(card.querySelector('[data-field="voters"]'), state.voters);
+};
+
+const applyVoteState = (card, state) => {
+    applyVoteCount(card, state);
+    setVoteButton(card.querySelector('.vote-form button'), state.voted);
+};
+
+// Card for a game from /api/games or /api/search, built from the template in games.html
+const renderGameCard = (template, game) => {
+    const card = template.content.firstElementChild.cloneNode(true);
+    const img = card.querySelector('img');
+    img.src = game.thumbnail || template.dataset.noImage;
+    img.alt = game.thumbnail ? game.name : 'No Image Available';
+    if (game.thumbnail_webp) {
+        const picture = document.createElement('picture');
+        const source = document.createElement('source');
+        source.srcset = game.thumbnail_webp;
+        source.type = 'image/webp';
+        img.replaceWith(picture);
+        picture.append(source, img);
+    }
+    card.querySelector('.card-title').textContent = game.name;
+    card.querySelector('[data-field="players"]').textContent = `${game.min_players}-${game.max_players}`;
+    card.querySelector('[data-field="playing_time"]').textContent = game.playing_time;
+    if (game.weight) {
+        const weight = card.querySelector('[data-field="weight"]');
+        weight.querySelector('span').textContent = game.weight.toFixed(1);
+        weight.classList.remove('d-none');
+    }
+
+    const votes = card.querySelector('[data-field="votes"]');
+    if (template.dataset.showVotes !== 'true') {
+        votes.remove();
+        return card;
+    }
+    const form = votes.querySelector('form');
+    form.action = game.vote_url;
+    const csrf = form.querySelector('input[type="hidden"]');
+    csrf.id = csrf.name = `${game.id}-csrf_token`;
+    csrf.value = template.dataset.csrfToken;
+    card.querySelector('.card').dataset.gameId = game.id;
+    applyVoteState(card, game);
+    return card;
+};
+
 document.addEventListener('DOMContentLoaded', () => {
-    const flashMessages = window.flashMessages || [];
-
-    if (flashMessages.length > 0) {
-        flashMessages.forEach(message => {
-            const toastContainer = document.getElementById('toast-container');
-            const toastEl = document.createElement('div');
-            toastEl.className = 'toast align-items-center text-bg-info border-0';
-            toastEl.role = 'alert';
-            toastEl.ariaLive = 'assertive';
-            toastEl.ariaAtomic = 'true';
-            toastEl.innerHTML = `
-                <div class="d-flex">
-                    <div class="toast-body">
-                        ${message}
-                    </div>
-                    <button type="button" class="btn-close btn-close-white me-2 m-auto" data-bs-dismiss="toast" aria-label="Close"></button>
-                </div>
-            `;
-            toastContainer.appendChild(toastEl);
-            const toast = new bootstrap.Toast(toastEl);
-            toast.show();
+    (window.flashMessages || []).forEach(showToast);
+});
+
+// Toggle votes in place; without JavaScript the form posts and redirects as before
+document.addEventListener('submit', async event => {
+    const form = event.target.closest('form.vote-form');
+    if (!form) {
+        return;
+    }
+    event.preventDefault();
+    const button = form.querySelector('button');
+    button.disabled = true;
+    try {
+        const response = await fetch(form.action, {
+            method: 'POST',
+            body: new FormData(form),
+            headers: { 'Accept': 'application/json' },
         });
+        if (!(response.headers.get('Content-Type') || '').includes('application/json')) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        const state = await response.json();
+        if (state.vote_count !== undefined) {
+            applyVoteState(form.closest('.card'), state);
+        }
+        const remaining = state.remaining_votes === undefined ? '' : ` Votes left: ${state.remaining_votes}.`;
+        showToast((state.message || state.error) + remaining);
+    } catch (error) {
+        // Fall back to a plain form post, which reports the outcome on the next page
+        console.error('Vote request failed:', error);
+        form.submit();
+    } finally {
+        button.disabled = false;
+    }
+});
+
+// Live vote counts pushed by the server; EventSource reconnects with Last-Event-ID by itself
+document.addEventListener('DOMContentLoaded', () => {
+    const template = document.getElementById('game-card-template');
+    if (!template || !template.dataset.eventsUrl || !('EventSource' in window)) {
+        return;
     }
+    const source = new EventSource(template.dataset.eventsUrl);
+    source.addEventListener('vote', event => {
+        const state = JSON.parse(event.data);
+        // A game can be on the page twice, in the catalogue and in search results
+        document.querySelectorAll(`.card[data-game-id="${state.game_id}"]`).forEach(card => applyVoteCount(card, state));
+    });
+    source.addEventListener('reload', () => {
+        // Too many updates were missed while disconnected to replay them
+        showToast('Votes have changed while you were away. Reload the page to see them.');
+    });
+});
+
+// Progressive loading of the games catalogue from /api/games
+document.addEventListener('DOMContentLoaded', () => {
+    const grid = document.getElementById('games-grid');
+    const template = document.getElementById('game-card-template');
+    const loadMore = document.getElementById('load-more-games');
+    if (!grid || !template || !loadMore || !grid.dataset.nextCursor) {
+        return;
+    }
+
+    let nextCursor = grid.dataset.nextCursor;
+    let loading = false;
+
+    const loadNextPage = async () => {
+        if (loading || !nextCursor) {
+            return;
+        }
+        loading = true;
+        try {
+            const url = new URL(grid.dataset.apiUrl, window.location.origin);
+            url.searchParams.set('cursor', nextCursor);
+            const response = await fetch(url, { headers: { 'Accept': 'application/json' } });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            const page = await response.json();
+            page.games.forEach(game => grid.appendChild(renderGameCard(template, game)));
+            nextCursor = page.next_cursor;
+            if (nextCursor) {
+                // Keep the link's own target in step, for opening the next page in a new tab
+                const link = new URL(loadMore.href);
+                link.searchParams.set('cursor', nextCursor);
+                loadMore.href = link;
+            }
+        } catch (error) {
+            // Leave the button visible so the visitor can retry
+            console.error('Failed to load more games:', error);
+        } finally {
+            loading = false;
+            loadMore.classList.toggle('d-none', !nextCursor);
+        }
+    };
+
+    // The link is the no-JavaScript fallback; here the next page is appended in place instead
+    loadMore.addEventListener('click', event => {
+        event.preventDefault();
+        loadNextPage();
+    });
+
+    // Fetch the next page as the visitor nears the end of the grid
+    if ('IntersectionObserver' in window) {
+        const observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadNextPage();
+            }
+        }, { rootMargin: '600px' });
+        observer.observe(loadMore);
+    }
+});
+
+// Type-ahead search: matching games replace the catalogue while there is a query
+document.addEventListener('DOMContentLoaded', () => {
+    const form = document.getElementById('game-search-form');
+    const input = document.getElementById('game-search');
+    const results = document.getElementById('search-results');
+    const empty = document.getElementById('search-empty');
+    const catalogue = document.getElementById('games-catalogue');
+    const template = document.getElementById('game-card-template');
+    if (!form || !input || !template) {
+        return;
+    }
+
+    form.classList.remove('d-none');  // Hidden without JavaScript, which the search needs
+    const minLength = Number(input.getAttribute('minlength')) || 2;
+    let timer = null;
+    let controller = null;
+
+    const showResults = games => {
+        results.replaceChildren(...(games || []).map(game => renderGameCard(template, game)));
+        results.classList.toggle('d-none', !games);
+        empty.classList.toggle('d-none', !games || games.length > 0);
+        catalogue.classList.toggle('d-none', !!games);
+    };
+
+    const search = async () => {
+        const query = input.value.trim();
+        if (controller) {
+            controller.abort();  // Only the latest query's results are shown
+        }
+        if (query.length < minLength) {
+            controller = null;
+            showResults(null);
+            return;
+        }
+        controller = new AbortController();
+        try {
+            const url = new URL(form.action, window.location.origin);
+            url.searchParams.set('q', query);
+            const response = await fetch(url, { headers: { 'Accept': 'application/json' }, signal: controller.signal });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            showResults((await response.json()).games);
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('Search failed:', error);
+            }
+        }
+    };
+
+    input.addEventListener('input', () => {
+        clearTimeout(timer);
+        timer = setTimeout(search, 150);
+    });
+    form.addEventListener('submit', event => {
+        event.preventDefault();
+        clearTimeout(timer);
+        search();
+    });
 });
-s
@@ -0,0 +1,111 @@
+# app/sync.py
+import logging
+import os
+import socket
+import time
+import redis
+from .bgg import update_all_games, utcnow
+from .cache import render_cache
+from .extensions import redis_client
+from . import metrics
+
+SYNC_LOCK_KEY = 'bgc:sync:lock'
+SYNC_STATUS_KEY = 'bgc:sync:status'
+SYNC_LOCK_TIMEOUT = 15 * 60  # Seconds the lock survives without progress, e.g. if the worker dies
+
+
+def set_sync_status(**fields):
+    """Merge fields into the shared sync status hash, ignoring Redis outages."""
+    try:
+        redis_client.hset(SYNC_STATUS_KEY, mapping={key: '' if value is None else str(value) for key, value in fields.items()})
+    except redis.RedisError as e:
+        logging.debug(f"Could not store sync status: {e}")
+
+
+def get_sync_status():
+    """Return the last stored sync status as a dict of strings, or None if unavailable.
+
+    Keys: state (running, succeeded, failed), phase, done, total, started_at,
+    finished_at, synced, failed, details_fetched, error and owner. A sync
+    still marked running after its lock expired died without recording its
+    outcome, and is reported as failed. Redis is skipped while the render
+    cache is backing off after an outage, as this runs on every index request.
+    """
+    if not render_cache.redis_available():
+        return None
+    try:
+        with metrics.timed('redis'):
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.hgetall(SYNC_STATUS_KEY)
+            pipe.exists(SYNC_LOCK_KEY)
+            status, locked = pipe.execute()
+    except redis.RedisError as e:
+        render_cache.redis_failed(e)
+        return None
+    status = {key.decode('utf-8'): value.decode('utf-8') for key, value in status.items()}
+    if status.get('state') == 'running' and not locked:
+        status.update(state='failed', error='The sync stopped without finishing.')
+    return status or None
+
+
+def run_sync(app, user_ids=None, progress=None):
+    """Run update_all_games unless another process is already syncing.
+
+    Only one sync may run at a time across the deployment: the caller must win
+    a Redis lock, which is extended every time the sync reports progress. If
+    Redis is unreachable the sync runs unlocked, since a missed nightly sync is
+    worse than an unlikely overlap. Progress and the outcome are written to
+    the sync status hash for the web app to display.
+
+    user_ids limits the sync to those members. progress, if given, is called
+    as progress(phase, done, total) in addition to updating the status hash.
+
+    Returns the update_all_games summary, or None if another sync holds the lock.
+    """
+    lock = redis_client.lock(SYNC_LOCK_KEY, timeout=SYNC_LOCK_TIMEOUT)
+    try:
+        if not lock.acquire(blocking=False):
+            logging.info("Another process is already syncing with BGG; skipping this run.")
+            return None
+    except redis.RedisError as e:
+        logging.warning(f"Could not take the sync lock, syncing without it: {e}")
+        lock = None
+
+    def report(phase, done, total):
+        set_sync_status(phase=phase, done=done, total=total)
+        if progress is not None:
+            progress(phase, done, total)
+        if lock is not None:
+            try:
+                lock.extend(SYNC_LOCK_TIMEOUT, replace_ttl=True)
+            except redis.RedisError as e:
+                logging.warning(f"Could not extend the sync lock: {e}")
+
+    set_sync_status(
+        state='running', phase='collections', done=0, total=0, started_at=utcnow().isoformat(),
+        finished_at=None, error=None, owner=f"{socket.gethostname()}:{os.getpid()}"
+    )
+    started = time.monotonic()
+    kind = 'all' if user_ids is None else 'members'
+    try:
+        summary = update_all_games(app, progress=report, user_ids=user_ids)
+        set_sync_status(
+            state='succeeded', finished_at=utcnow().isoformat(), synced=len(summary['synced']),
+            failed=len(summary['failed']), details_fetched=summary['details']['fetched']
+        )
+        metrics.observe_sync(
+            kind, time.monotonic() - started, synced=summary['synced'], failed=summary['failed'],
+            details_fetched=summary['details']['fetched'], thumbnails=summary['thumbnails']
+        )
+        return summary
+    except Exception as e:
+        logging.exception("Sync with BGG failed")
+        set_sync_status(state='failed', finished_at=utcnow().isoformat(), error=str(e))
+        metrics.observe_sync(kind, time.monotonic() - started, error=e)
+        raise
+    finally:
+        if lock is not None:
+            try:
+                lock.release()
+            except redis.RedisError as e:
+                logging.warning(f"Could not release the sync lock: {e}")
@@ -0,0 +1,127 @@
+# app/thumbnails.py
+import hashlib
+import io
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+from .models import db, Game
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it games keep hot-linking BGG thumbnails
+    Image = None
+
+THUMBNAIL_SIZE = (300, 300)  # Bounding box for the resized variants
+THUMBNAIL_QUALITY = 80
+# Variant extension -> (Pillow format, MIME type)
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpg': ('JPEG', 'image/jpeg'),
+}
+DOWNLOAD_WORKERS = 4  # Concurrent thumbnail downloads from BGG's image CDN
+DOWNLOAD_TIMEOUT = (5, 30)  # Connect and read timeouts in seconds
+RETRY_FAILED_AFTER = timedelta(days=7)  # A URL that failed to download is left alone this long
+
+_session = None  # Created on first download; the web app only serves stored thumbnails
+_session_lock = threading.Lock()
+
+
+def http_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = requests.Session()
+    return _session
+
+
+def thumbnail_dir():
+    """Directory holding the local thumbnail store, shared by the web app and the sync worker."""
+    return current_app.config.get('THUMBNAIL_DIR') or os.path.join(current_app.instance_path, 'thumbnails')
+
+
+def thumbnail_path(directory, digest, ext):
+    return os.path.join(directory, digest[:2], f'{digest}.{ext}')
+
+
+def store_thumbnail(directory, data):
+    """Resize image bytes into every variant, stored under the hash of the original.
+
+    Content addressing means an image shared by several games, or downloaded
+    again, is only processed and stored once. Returns the hash.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    paths = {ext: thumbnail_path(directory, digest, ext) for ext in THUMBNAIL_FORMATS}
+    if all(os.path.exists(path) for path in paths.values()):
+        return digest
+
+    os.makedirs(os.path.dirname(paths['jpg']), exist_ok=True)
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert('RGB')
+        image.thumbnail(THUMBNAIL_SIZE)
+        for ext, (image_format, _) in THUMBNAIL_FORMATS.items():
+            # Write then rename so a reader never sees a half-written file
+            temp_path = f'{paths[ext]}.{os.getpid()}.{threading.get_ident()}.tmp'
+            image.save(temp_path, image_format, quality=THUMBNAIL_QUALITY)
+            os.replace(temp_path, paths[ext])
+    return digest
+
+
+def download_thumbnail(directory, url):
+    response = http_session().get(url, timeout=DOWNLOAD_TIMEOUT)
+    response.raise_for_status()
+    return store_thumbnail(directory, response.content)
+
+
+def cache_thumbnails():
+    """Download thumbnails for games whose local copy is missing or out of date.
+
+    Downloads run on a small thread pool; the resulting hashes are written back
+    with one bulk update and commit. A failed download is logged and recorded
+    against its URL, which is only tried again after RETRY_FAILED_AFTER, or
+    as soon as BGG reports a new one. Returns the number of games updated.
+    """
+    if Image is None:
+        logging.info("Pillow is not installed; skipping the local thumbnail cache.")
+        return 0
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows = db.session.execute(
+        select(Game.id, Game.thumbnail).where(
+            Game.thumbnail.isnot(None),
+            Game.thumbnail != '',
+            or_(
+                Game.thumbnail_source.is_(None),
+                Game.thumbnail_source != Game.thumbnail,
+                and_(Game.thumbnail_failed_at.isnot(None), Game.thumbnail_failed_at < now - RETRY_FAILED_AFTER),
+            )
+        )
+    ).all()
+    if not rows:
+        return 0
+
+    directory = thumbnail_dir()
+    updates, failures = [], []
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix='thumbnails') as pool:
+        futures = {pool.submit(download_thumbnail, directory, url): (game_id, url) for game_id, url in rows}
+        for future in as_completed(futures):
+            game_id, url = futures[future]
+            try:
+                updates.append({'id': game_id, 'thumbnail_hash': future.result(), 'thumbnail_source': url,
+                                'thumbnail_failed_at': None})
+            except Exception as e:
+                logging.warning(f"Could not cache thumbnail {url}: {e}")
+                # The game hot-links the new URL meanwhile; the source marks it as attempted
+                failures.append({'id': game_id, 'thumbnail_hash': None, 'thumbnail_source': url,
+                                 'thumbnail_failed_at': now})
+
+    if updates or failures:
+        db.session.execute(update(Game), updates + failures)
+        db.session.commit()
+    logging.info(f"Cached {len(updates)} of {len(rows)} missing thumbnails, {len(failures)} failed.")
+    return len(updates)
@@ -0,0 +1,97 @@
+# app/user_cache.py
+"""Per-process cache of logged-in members for Flask-Login's user loader.
+
+Every authenticated request loads its member. Within USER_CACHE_TTL seconds of
+the last load, the member's columns are copied from this cache into the
+request's session without a query. Their votes and games are still queried
+when used.
+
+Each copy is tied to the members version it was loaded at, a Redis counter
+bumped after every commit that changes or deletes a member: admin_commands.py
+edits and deletes, password resets and rehashes at login. Every web process
+then drops its copies on its next request, while votes and syncs leave them
+alone. The process that made the change drops the member's copy at once.
+Without Redis the version also moves every LOCAL_VERSION_TTL seconds, like
+the render cache's.
+"""
+import logging
+import time
+import redis
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from .cache import LOCAL_VERSION_TTL, LRUCache, render_cache
+from .extensions import redis_client
+from .models import db, User
+from . import metrics
+
+USER_CACHE_SIZE = 1024  # Members kept per process
+MEMBERS_VERSION_KEY = 'bgc:members_version'  # Bumped whenever a member row changes
+
+_users = LRUCache(USER_CACHE_SIZE)
+_columns = [attribute.key for attribute in inspect(User).column_attrs]
+
+
+def members_version():
+    """Return the current members version."""
+    if render_cache.redis_available():
+        try:
+            with metrics.timed('redis'):
+                return int(redis_client.get(MEMBERS_VERSION_KEY) or 0)
+        except redis.RedisError as e:
+            render_cache.redis_failed(e)
+    return f'local.{int(time.monotonic() // LOCAL_VERSION_TTL)}'
+
+
+def bump_members_version():
+    """Make every process reload the members it has cached."""
+    if not render_cache.redis_available():
+        return
+    try:
+        with metrics.timed('redis'):
+            redis_client.incr(MEMBERS_VERSION_KEY)
+    except redis.RedisError as e:
+        logging.warning(f"Could not bump the members version: {e}")
+        render_cache.redis_failed(e)
+
+
+def load_user(user_id):
+    """Return the member with this ID, attached to the current session, or None."""
+    ttl = current_app.config['USER_CACHE_TTL']
+    if ttl <= 0:
+        return db.session.get(User, user_id)
+
+    version = members_version()
+    cached = _users.get(user_id)
+    if cached is not None and cached[0] > time.monotonic() and cached[1] == version:
+        user = User(**cached[2])
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    user = db.session.get(User, user_id)
+    if user is not None:
+        _users.set(user_id, (time.monotonic() + ttl, version, {key: getattr(user, key) for key in _columns}))
+    return user
+
+
+def forget_user(user_id):
+    _users.delete(user_id)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _forget_changed_user(mapper, connection, user):
+    forget_user(user.id)
+    # Other processes are told once the change is committed, so they cannot reload the old row
+    object_session(user).info['members_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_after_member_change(session):
+    if session.info.pop('members_changed', False):
+        bump_members_version()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_member_change(session):
+    session.info.pop('members_changed', None)
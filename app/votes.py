@@ -0,0 +1,60 @@
+# app/votes.py
+from sqlalchemy import delete, exists, func, insert, literal, select, update
+from .models import db, Game, User, votes
+
+MAX_VOTES = 3  # Votes each member may hold at once
+
+
+def cast_vote(user_id, game_id):
+    """Record a vote if the user has votes left, keeping Game.vote_count in step.
+
+    The cap is checked by the INSERT itself (INSERT ... SELECT ... WHERE the
+    user holds fewer than MAX_VOTES votes). That alone is atomic on SQLite,
+    where writers are serialized, but under Postgres' READ COMMITTED two
+    votes for different games could both count the same held votes, so the
+    member's row is locked first and racing votes by one member queue behind
+    each other. Returns True if the vote was recorded, False if not, also
+    when the member no longer exists. The caller commits.
+    """
+    member = db.session.execute(select(User.id).where(User.id == user_id).with_for_update()).scalar()
+    if member is None:
+        return False
+    held = select(func.count()).select_from(votes).where(votes.c.user_id == user_id).scalar_subquery()
+    already_voted = exists().where(votes.c.user_id == user_id, votes.c.game_id == game_id)
+    result = db.session.execute(
+        insert(votes).from_select(
+            ['user_id', 'game_id'],
+            select(literal(user_id), literal(game_id)).where(held < MAX_VOTES, ~already_voted)
+        )
+    )
+    if result.rowcount != 1:
+        return False
+    db.session.execute(update(Game).where(Game.id == game_id).values(vote_count=Game.vote_count + 1))
+    return True
+
+
+def remove_vote(user_id, game_id):
+    """Remove the user's vote for a game, if any. Returns True if a vote was removed. The caller commits."""
+    result = db.session.execute(delete(votes).where(votes.c.user_id == user_id, votes.c.game_id == game_id))
+    if result.rowcount != 1:
+        return False
+    db.session.execute(update(Game).where(Game.id == game_id).values(vote_count=Game.vote_count - 1))
+    return True
+
+
+def clear_votes(user_id):
+    """Remove all of a user's votes, e.g. before deleting them. The caller commits."""
+    game_ids = select(votes.c.game_id).where(votes.c.user_id == user_id)
+    db.session.execute(update(Game).where(Game.id.in_(game_ids)).values(vote_count=Game.vote_count - 1))
+    db.session.execute(delete(votes).where(votes.c.user_id == user_id))
+
+
+def recount_votes():
+    """Recompute every Game.vote_count from the votes table and commit.
+
+    Returns the number of games whose stored counter was wrong.
+    """
+    actual = select(func.count()).select_from(votes).where(votes.c.game_id == Game.id).scalar_subquery()
+    result = db.session.execute(update(Game).where(Game.vote_count != actual).values(vote_count=actual))
+    db.session.commit()
+    return result.rowcount
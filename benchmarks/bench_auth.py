@@ -0,0 +1,79 @@
+# benchmarks/bench_auth.py
+"""Measure logins and authenticated requests.
+
+Seeds a throwaway SQLite database through bench_suite.seed, plus one
+newcomer whose password is still their BGG username, and drives the Flask
+test client:
+
+    login            POST /login as a member with their own password
+    login_default    POST /login as the newcomer, who is sent to reset it
+    authenticated    GET /reset_password, a page that only loads the member,
+                     with USER_CACHE_TTL as configured and with it set to 0
+
+Each login is preceded by a logout that is not timed. Every scenario reports
+latency percentiles and SQL statements per request.
+
+Usage: python benchmarks/bench_auth.py [--logins 20] [--requests 500]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_suite import PASSWORD, StatementCounter, seed, timed_requests  # noqa: E402  Sets up the throwaway database
+from app import create_app  # noqa: E402
+from app.models import db, User  # noqa: E402
+
+NEWCOMER = 'newcomer'
+
+
+def bench_logins(app, counter, name, password, count):
+    client = app.test_client()
+    form = {'username': name, 'password': password}
+    client.post('/login', data=form)  # Untimed: members added before the reset flag get it filled in here
+    return timed_requests(client, counter, count, lambda i: client.post('/login', data=form),
+                          before=lambda i: client.get('/logout'))
+
+
+def bench_authenticated(app, counter, ttl, count):
+    app.config['USER_CACHE_TTL'] = ttl
+    client = app.test_client()
+    client.post('/login', data={'username': 'member0', 'password': PASSWORD})
+    return timed_requests(client, counter, count, lambda i: client.get('/reset_password'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--games', type=int, default=500)
+    parser.add_argument('--logins', type=int, default=20, help='Timed logins per scenario; hashing makes each slow')
+    parser.add_argument('--requests', type=int, default=500, help='Timed authenticated requests per scenario')
+    args = parser.parse_args()
+
+    app = create_app('web')
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        seed(args.games, args.users)
+        newcomer = User(name=NEWCOMER, bgg_username=NEWCOMER)
+        newcomer.set_password(NEWCOMER)
+        db.session.add(newcomer)
+        db.session.commit()
+        counter = StatementCounter(db.engine)
+        db.session.remove()
+
+    ttl = app.config.get('USER_CACHE_TTL', 0)
+    results = {
+        'login': bench_logins(app, counter, 'member0', PASSWORD, args.logins),
+        'login_default': bench_logins(app, counter, NEWCOMER, NEWCOMER, args.logins),
+        f'authenticated_ttl{ttl}': bench_authenticated(app, counter, ttl, args.requests),
+        'authenticated_ttl0': bench_authenticated(app, counter, 0, args.requests),
+    }
+    print(f"{'scenario':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'statements':>11}")
+    for name, result in results.items():
+        print(f"{name:<22} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} "
+              f"{result['statements_per_request']:>11}")
+
+
+if __name__ == '__main__':
+    main()
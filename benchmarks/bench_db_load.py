@@ -0,0 +1,161 @@
+# benchmarks/bench_db_load.py
+"""Concurrent read/write load test for the SQLite database profile.
+
+Reader threads page through /api/games with the Flask test client while a
+sync writer rewrites game details and collections in large transactions and
+a voter thread toggles votes in small ones, the way the nightly sync and
+members' clicks overlap in production. Each journal mode runs in a fresh
+interpreter against its own throwaway database, once with SQLITE_WAL off
+(rollback journal, as before) and once with it on.
+
+Reported per mode: reads and writes completed, read latency percentiles, and
+the reads and writes that failed with "database is locked".
+
+Usage: python benchmarks/bench_db_load.py [--seconds 10] [--readers 8] [--games 5000] [--users 50]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_mode(args):
+    """Run the load in this interpreter; DATABASE_URI and SQLITE_WAL come from the parent."""
+    from sqlalchemy import select, update
+    from sqlalchemy.exc import OperationalError
+    from app import create_app
+    from app.models import db, Game, user_games
+    from app.votes import cast_vote, remove_vote
+    from bench_suite import percentiles, seed
+
+    app = create_app('web')
+    with app.app_context():
+        seed(args.games, args.users)
+        journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+        db.session.remove()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {'reads': 0, 'read_errors': 0, 'sync_batches': 0, 'votes': 0, 'write_errors': 0}
+    samples = []
+
+    def count(key, sample=None):
+        with lock:
+            stats[key] += 1
+            if sample is not None:
+                samples.append(sample)
+
+    def reader():
+        client = app.test_client()
+        rng = random.Random()
+        while not stop.is_set():
+            sort = rng.choice(('votes', 'name'))
+            started = time.perf_counter()
+            response = client.get(f'/api/games?sort={sort}&limit=50&max_time={rng.choice((60, 90, 120))}')
+            if response.status_code == 200:
+                count('reads', time.perf_counter() - started)
+            else:
+                count('read_errors')
+
+    def sync_writer():
+        rng = random.Random(2)
+        while not stop.is_set():
+            with app.app_context():
+                try:
+                    # One member's collection replaced and a batch of game details refreshed, in one transaction
+                    user_id = rng.randint(1, args.users)
+                    owned = db.session.scalars(select(user_games.c.game_id).where(user_games.c.user_id == user_id)).all()
+                    db.session.execute(user_games.delete().where(user_games.c.user_id == user_id))
+                    db.session.execute(user_games.insert(), [{'user_id': user_id, 'game_id': game_id} for game_id in owned])
+                    first = rng.randint(1, max(1, args.games - args.batch))
+                    db.session.execute(
+                        update(Game).where(Game.id.between(first, first + args.batch))
+                        .values(playing_time=rng.choice((30, 45, 60, 90, 120)))
+                    )
+                    time.sleep(args.hold)  # Stands in for the rest of a sync batch's work before it commits
+                    db.session.commit()
+                    count('sync_batches')
+                except OperationalError:
+                    db.session.rollback()
+                    count('write_errors')
+                finally:
+                    db.session.remove()
+            time.sleep(args.gap)  # BGG requests between batches
+
+    def voter():
+        rng = random.Random(3)
+        while not stop.is_set():
+            with app.app_context():
+                try:
+                    user_id, game_id = rng.randint(1, args.users), rng.randint(1, args.games)
+                    if not remove_vote(user_id, game_id):
+                        cast_vote(user_id, game_id)
+                    db.session.commit()
+                    count('votes')
+                except OperationalError:
+                    db.session.rollback()
+                    count('write_errors')
+                finally:
+                    db.session.remove()
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=sync_writer), threading.Thread(target=voter)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(json.dumps({
+        'journal_mode': journal_mode,
+        **stats,
+        'reads_per_s': round(stats['reads'] / args.seconds, 1),
+        **(percentiles(samples) if samples else {}),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10, help='Duration of each run')
+    parser.add_argument('--readers', type=int, default=8, help='Concurrent reader threads')
+    parser.add_argument('--games', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--batch', type=int, default=1000, help='Games updated per sync transaction')
+    parser.add_argument('--hold', type=float, default=0.2, help='Seconds each sync transaction stays open')
+    parser.add_argument('--gap', type=float, default=0.2, help='Seconds between sync transactions')
+    parser.add_argument('--mode', choices=('legacy', 'wal'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args)
+        return
+
+    results = {}
+    for mode in ('legacy', 'wal'):
+        workdir = tempfile.mkdtemp(prefix='bgc-bench-')  # The web profile writes logs/ into the working directory
+        env = dict(os.environ, SQLITE_WAL='true' if mode == 'wal' else 'false', RATELIMIT_ENABLED='false')
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--mode', mode, *sys.argv[1:]],
+                                cwd=workdir, env=env, capture_output=True, text=True, check=True).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"{'mode':<8} {'journal':<8} {'reads/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'read err':>9} {'syncs':>6} {'votes':>6} {'write err':>10}")
+    for mode, result in results.items():
+        print(f"{mode:<8} {result['journal_mode']:<8} {result['reads_per_s']:>8} {result.get('p50_ms', 0):>8} "
+              f"{result.get('p95_ms', 0):>8} {result.get('p99_ms', 0):>8} {result.get('max_ms', 0):>8} "
+              f"{result['read_errors']:>9} {result['sync_batches']:>6} {result['votes']:>6} {result['write_errors']:>10}")
+
+
+if __name__ == '__main__':
+    main()
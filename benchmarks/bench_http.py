@@ -0,0 +1,127 @@
+# benchmarks/bench_http.py
+"""Measure bytes sent and response time for first and repeat visits.
+
+Seeds a throwaway SQLite database through bench_suite.seed, builds the
+fingerprinted assets (into app/static/dist, as build_assets.py does) and
+requests the index and its static files through the Flask test client, as an
+anonymous visitor and as a logged-in member:
+
+    plain   no compression and no validators, as before conditional requests
+    first   a first visit from a browser that accepts gzip (and br, if installed)
+    repeat  the browser revalidating its copy with If-None-Match
+
+For the static files, plain is the unfingerprinted URL revalidated on every
+visit, while fingerprinted URLs are immutable and not requested again at all.
+Bytes are body plus response headers.
+
+Usage: python benchmarks/bench_http.py [--games 2000] [--users 30] [--requests 50]
+"""
+import argparse
+import gzip
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_suite import PASSWORD, percentiles, seed  # noqa: E402  Sets up the throwaway database
+from app import assets, create_app  # noqa: E402
+from app.models import db  # noqa: E402
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app', 'static')
+ASSET_PATTERN = re.compile(r'(?:src|href)="(/static/[^"]+)"')
+
+
+def response_bytes(response):
+    headers = sum(len(f"{name}: {value}\r\n") for name, value in response.headers.items())
+    return len(response.get_data()) + headers + len(f"HTTP/1.1 {response.status}\r\n\r\n")
+
+
+def timed(client, url, count, headers=None):
+    """Request url count times, returning (last response, bytes, p50 ms)."""
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers or {})
+        samples.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            raise SystemExit(f"{url} failed with HTTP {response.status_code}")
+    return response, response_bytes(response), percentiles(samples)['p50_ms']
+
+
+def visits(client, url, count, accept):
+    """Return {scenario: (status, bytes, p50 ms)} for one URL."""
+    plain, plain_bytes, plain_ms = timed(client, url, count)
+    first, first_bytes, first_ms = timed(client, url, count, {'Accept-Encoding': accept})
+    revalidate = {'Accept-Encoding': accept, 'If-None-Match': first.headers.get('ETag', '')}
+    repeat, repeat_bytes, repeat_ms = timed(client, url, count, revalidate)
+    return {
+        'plain': (plain.status_code, plain_bytes, plain_ms),
+        'first': (first.status_code, first_bytes, first_ms),
+        'repeat': (repeat.status_code, repeat_bytes, repeat_ms),
+    }
+
+
+def asset_urls(client, accept):
+    """Return the static URLs the index links to."""
+    response = client.get('/', headers={'Accept-Encoding': accept})
+    body = response.get_data()
+    if response.headers.get('Content-Encoding') == 'gzip':
+        body = gzip.decompress(body)
+    elif response.headers.get('Content-Encoding') == 'br':
+        body = assets.brotli.decompress(body)
+    return sorted(set(ASSET_PATTERN.findall(body.decode('utf-8'))))
+
+
+def print_row(url, visitor, scenario, result):
+    status, sent, p50_ms = result
+    print(f"{url[-44:]:<44} {visitor:<10} {scenario:<8} {status:>6} {sent:>8} {p50_ms:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=30)
+    parser.add_argument('--requests', type=int, default=50, help='Requests per measurement')
+    args = parser.parse_args()
+
+    manifest = assets.build(STATIC_FOLDER)
+    app = create_app('web')
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        seed(args.games, args.users)
+        db.session.remove()
+    accept = 'br, gzip' if assets.brotli is not None else 'gzip'
+    print(f"{args.games} games, {len(manifest)} assets, Accept-Encoding: {accept}")
+    print(f"{'url':<44} {'visitor':<10} {'scenario':<8} {'status':>6} {'bytes':>8} {'p50 ms':>8}")
+
+    for visitor in ('anonymous', 'member'):
+        client = app.test_client()
+        if visitor == 'member':
+            client.post('/login', data={'username': 'member0', 'password': PASSWORD})
+            client.get('/')  # Consume the login flash message
+
+        page = visits(client, '/', args.requests, accept)
+        for scenario, result in page.items():
+            print_row('/', visitor, scenario, result)
+        # A repeat visit: before, the full page plus a revalidation of every asset;
+        # now a 304 for the page, while the fingerprinted assets come from the browser cache
+        before, after = [1, page['plain'][1]], [1, page['repeat'][1]]
+
+        fingerprinted = {target: name for name, target in manifest.items()}
+        for url in asset_urls(client, accept):
+            original = f"/static/{fingerprinted[url[len('/static/'):]]}"
+            plain = visits(client, original, args.requests, accept)
+            print_row(original, visitor, 'plain', plain['plain'])
+            print_row(original, visitor, 'repeat', plain['repeat'])
+            print_row(url, visitor, 'first', visits(client, url, args.requests, accept)['first'])
+            before[0] += 1
+            before[1] += plain['repeat'][1]
+
+        print(f"repeat visit, {visitor}: {before[0]} requests and {before[1]} bytes before, "
+              f"{after[0]} request and {after[1]} bytes now")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/bench_index.py
+"""Count the SQL statements and time one render of the games index.
+
+Seeds a throwaway SQLite database with members, games, ownership and votes,
+logs a member in through the Flask test client and requests '/' for a few
+catalogue sizes, both with the render cache invalidated before every request
+(cold) and served from it (warm). The statement count must not grow with the
+number of games; test_index_statements.py pins the exact counts.
+
+Usage: python benchmarks/bench_index.py [--sizes 50 500] [--users 30]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_suite import StatementCounter  # noqa: E402  Sets up the throwaway database
+from sqlalchemy import insert  # noqa: E402
+from app import create_app  # noqa: E402
+from app.cache import bump_data_version  # noqa: E402
+from app.models import db, Game, User, user_games, votes  # noqa: E402
+from app.votes import recount_votes  # noqa: E402
+
+
+def seed(games, users, seed_value=1):
+    """Replace the database contents with a random club of the given size."""
+    rng = random.Random(seed_value)
+    db.drop_all()
+    db.create_all()
+    member = User(name='member0', bgg_username='member0')
+    member.set_password('benchmark')
+    db.session.add(member)
+    db.session.flush()
+    db.session.execute(insert(User), [
+        {'name': f'member{i}', 'bgg_username': f'member{i}', 'password_hash': member.password_hash}
+        for i in range(1, users)
+    ])
+    db.session.execute(insert(Game), [
+        {'bgg_id': 1000 + i, 'name': f'Game {i}', 'thumbnail': '', 'min_players': rng.randint(1, 3),
+         'max_players': rng.randint(3, 8), 'playing_time': rng.choice((30, 45, 60, 90, 120))}
+        for i in range(games)
+    ])
+    db.session.execute(insert(user_games), [
+        {'user_id': user_id, 'game_id': game_id}
+        for user_id in range(1, users + 1)
+        for game_id in rng.sample(range(1, games + 1), min(games, 40))
+    ])
+    db.session.execute(insert(votes), [
+        {'user_id': user_id, 'game_id': game_id}
+        for user_id in range(1, users + 1)
+        for game_id in rng.sample(range(1, games + 1), min(games, 3))
+    ])
+    db.session.commit()
+    recount_votes()
+    bump_data_version()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 500], help='Catalogue sizes to render')
+    parser.add_argument('--users', type=int, default=30, help='Club members to seed')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed renders per size (best is reported)')
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    client = app.test_client()
+    print(f"{'games':>8} {'cache':>6} {'statements':>11} {'best ms':>10} {'bytes':>10}")
+    counts = set()
+    for size in args.sizes:
+        with app.app_context():
+            seed(size, args.users)
+            counter = StatementCounter(db.engine)
+        client.post('/login', data={'username': 'member0', 'password': 'benchmark'})
+
+        for cache in ('cold', 'warm'):
+            best = float('inf')
+            for _ in range(args.repeat):
+                if cache == 'cold':
+                    bump_data_version()
+                counter.statements = 0
+                started = time.perf_counter()
+                response = client.get('/')
+                best = min(best, time.perf_counter() - started)
+            assert response.status_code == 200
+            counts.add((cache, counter.statements))
+            print(f"{size:>8} {cache:>6} {counter.statements:>11} {best * 1000:>10.1f} {len(response.data):>10}")
+
+    if len(counts) > 2:
+        sys.exit(f"Statement count grows with the catalogue size: {sorted(counts)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+# benchmarks/bench_parse.py
+"""Micro-benchmark BGG XML parsing: full-tree ElementTree versus streaming iterparse.
+
+Writes a large collection fixture (stats=1 shaped) and a thing fixture to a
+temporary directory, then reports parse time and peak traced memory for the
+original fromstring/findall parsers and for app.bgg's streaming parsers. The
+original parsers read the whole body into memory first, as response.content
+did; the streaming ones read from the open file, as they do from the socket.
+
+Usage: python benchmarks/bench_parse.py [--items 5000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import bgg  # noqa: E402
+
+
+def write_collection_fixture(path, count):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'<?xml version="1.0" encoding="utf-8" standalone="yes"?>\n<items totalitems="{count}">\n')
+        for i in range(count):
+            f.write(
+                f'<item objecttype="thing" objectid="{1000 + i}" subtype="boardgame" collid="{50000 + i}">'
+                f'<name sortindex="1">Benchmark Game {i}</name><yearpublished>2015</yearpublished>'
+                f'<image>https://cf.geekdo-images.com/original/img/{i}.jpg</image>'
+                f'<thumbnail>https://cf.geekdo-images.com/thumb/img/{i}.jpg</thumbnail>'
+                f'<stats minplayers="2" maxplayers="4" minplaytime="60" maxplaytime="90" playingtime="90" numowned="12345">'
+                f'<rating value="N/A"><usersrated value="4567"/><average value="7.45"/><bayesaverage value="7.12"/>'
+                f'<stddev value="1.31"/><median value="0"/><ranks>'
+                f'<rank type="subtype" id="1" name="boardgame" friendlyname="Board Game Rank" value="{i + 1}" bayesaverage="7.12"/>'
+                f'<rank type="family" id="5497" name="strategygames" friendlyname="Strategy Game Rank" value="{i + 1}" bayesaverage="7.10"/>'
+                f'</ranks></rating></stats>'
+                f'<status own="1" prevowned="0" fortrade="0" want="0" wanttoplay="0" wanttobuy="0" wishlist="0" preordered="0" lastmodified="2024-01-01 12:00:00"/>'
+                f'<numplays>3</numplays></item>\n'
+            )
+        f.write('</items>\n')
+
+
+def write_thing_fixture(path, count):
+    poll = ''.join(
+        f'<results numplayers="{n}"><result value="Best" numvotes="10"/><result value="Recommended" numvotes="20"/>'
+        f'<result value="Not Recommended" numvotes="5"/></results>'
+        for n in range(1, 6)
+    )
+    links = ''.join(
+        f'<link type="boardgame{kind}" id="{j}" value="Benchmark {kind} {j}"/>'
+        for kind in ('category', 'mechanic', 'designer', 'artist', 'publisher', 'family')
+        for j in range(4)
+    )
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<items termsofuse="https://boardgamegeek.com/xmlapi/termsofuse">\n')
+        for i in range(count):
+            f.write(
+                f'<item type="boardgame" id="{1000 + i}">'
+                f'<thumbnail>https://cf.geekdo-images.com/thumb/img/{i}.jpg</thumbnail>'
+                f'<image>https://cf.geekdo-images.com/original/img/{i}.jpg</image>'
+                f'<name type="primary" sortindex="1" value="Benchmark Game {i}"/>'
+                f'<name type="alternate" sortindex="1" value="Alternate Name {i}"/>'
+                f'<description>{"A long description of the game. " * 40}</description>'
+                f'<yearpublished value="2015"/><minplayers value="2"/><maxplayers value="4"/>'
+                f'<poll name="suggested_numplayers" title="User Suggested Number of Players" totalvotes="35">{poll}</poll>'
+                f'<playingtime value="90"/><minplaytime value="60"/><maxplaytime value="90"/><minage value="12"/>'
+                f'{links}'
+                f'<statistics page="1"><ratings><usersrated value="4567"/><average value="7.45"/>'
+                f'<bayesaverage value="7.12"/><averageweight value="2.85"/></ratings></statistics>'
+                f'</item>\n'
+            )
+        f.write('</items>\n')
+
+
+def legacy_parse_collection(path):
+    with open(path, 'rb') as f:
+        root = ET.fromstring(f.read())
+    return [item.attrib['objectid'] for item in root.findall('item') if item.attrib.get('subtype') == 'boardgame']
+
+
+def legacy_parse_game_details(item):
+    name = item.find("name[@type='primary']").attrib.get('value', 'Unknown Game')
+    thumbnail = item.find('thumbnail').text if item.find('thumbnail') is not None else ''
+    min_players = item.find('minplayers').attrib.get('value') if item.find('minplayers') is not None else None
+    max_players = item.find('maxplayers').attrib.get('value') if item.find('maxplayers') is not None else None
+    playing_time = item.find('playingtime').attrib.get('value') if item.find('playingtime') is not None else None
+    average_rating = item.find('statistics/rating/average')
+    difficulty = average_rating.attrib.get('value') if average_rating is not None else 'N/A'
+    return {
+        'name': name,
+        'thumbnail': thumbnail,
+        'min_players': int(min_players) if min_players else None,
+        'max_players': int(max_players) if max_players else None,
+        'playing_time': int(playing_time) if playing_time else None,
+        'difficulty': difficulty
+    }
+
+
+def legacy_parse_things(path):
+    with open(path, 'rb') as f:
+        root = ET.fromstring(f.read())
+    return [legacy_parse_game_details(item) for item in root.findall('item')]
+
+
+def streaming_parse_collection(path):
+    with open(path, 'rb') as f:
+        return bgg.parse_bgg_collection(f)
+
+
+def streaming_parse_things(path):
+    with open(path, 'rb') as f:
+        return [bgg.parse_game_details(item) for item in bgg.iter_items(f)]
+
+
+def measure(func, path, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(path)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    func(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=5000, help='Items in each fixture')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per parser (best is reported)')
+    args = parser.parse_args()
+
+    fixture_dir = tempfile.mkdtemp(prefix='bgc-bench-')
+    collection_path = os.path.join(fixture_dir, 'collection.xml')
+    thing_path = os.path.join(fixture_dir, 'thing.xml')
+    write_collection_fixture(collection_path, args.items)
+    write_thing_fixture(thing_path, args.items)
+
+    print(f"{'parser':<24} {'fixture MB':>10} {'best ms':>10} {'peak MB':>10}")
+    for label, func, path in (
+        ('collection (tree)', legacy_parse_collection, collection_path),
+        ('collection (stream)', streaming_parse_collection, collection_path),
+        ('thing (tree)', legacy_parse_things, thing_path),
+        ('thing (stream)', streaming_parse_things, thing_path),
+    ):
+        result, best, peak = measure(func, path, args.repeat)
+        assert len(result) == args.items
+        size = os.path.getsize(path) / 2 ** 20
+        print(f"{label:<24} {size:>10.1f} {best * 1000:>10.1f} {peak / 2 ** 20:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
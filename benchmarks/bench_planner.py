@@ -0,0 +1,103 @@
+# benchmarks/bench_planner.py
+"""Measure the game night planner on a large club.
+
+Seeds a throwaway SQLite database through bench_suite.seed and times
+building the planner index, answering random attendee sets from it, the
+whole /api/plan request of a logged-in member, and the same question asked of the database as one
+SQL query. The SQL answers also check the index: both must list the same
+games in the same order.
+
+Usage: python benchmarks/bench_planner.py [--users 500] [--games 20000] [--owned 200] [--plans 500]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_suite import PASSWORD, percentiles, seed  # noqa: E402  Sets up the throwaway database
+from sqlalchemy import select  # noqa: E402
+from app import create_app  # noqa: E402
+from app.models import db, Game, User, user_games  # noqa: E402
+from app.planner import PLAN_LIMIT, PlannerIndex  # noqa: E402
+
+
+def sql_plan(attendee_ids, players, max_time):
+    query = (
+        select(Game.id)
+        .where(Game.id.in_(select(user_games.c.game_id).where(user_games.c.user_id.in_(attendee_ids))))
+        .where(Game.min_players <= players, Game.max_players >= players)
+    )
+    if max_time is not None:
+        query = query.where(Game.playing_time <= max_time, Game.playing_time > 0)
+    return db.session.execute(query.order_by(Game.vote_count.desc(), Game.id).limit(PLAN_LIMIT)).scalars().all()
+
+
+def timed(run, cases):
+    samples, results = [], []
+    for case in cases:
+        started = time.perf_counter()
+        results.append(run(*case))
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--games', type=int, default=20000)
+    parser.add_argument('--owned', type=int, default=200, help='Games owned per member')
+    parser.add_argument('--plans', type=int, default=500, help='Attendee sets per measurement')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    app = create_app('web')
+    app.config['WTF_CSRF_ENABLED'] = False
+    client = app.test_client()
+    with app.app_context():
+        seed(args.games, args.users, owned=args.owned)
+        members = db.session.execute(select(User.id, User.name)).all()
+    client.post('/login', data={'username': 'member0', 'password': PASSWORD})  # /api/plan is for members only
+    with app.app_context():
+        builds = []
+        for _ in range(5):
+            started = time.perf_counter()
+            index = PlannerIndex.build(version=0)
+            builds.append(time.perf_counter() - started)
+
+        cases = []
+        for _ in range(args.plans):
+            attendees = rng.sample(members, rng.randint(2, 12))
+            players = len(attendees) + rng.randint(0, 2)
+            cases.append((attendees, players, rng.choice((None, 45, 60, 90, 120))))
+
+        index_timing, index_results = timed(
+            lambda attendees, players, max_time: [game_id for game_id, _ in index.plan(
+                [user_id for user_id, _ in attendees], players, max_time)[0]],
+            cases)
+        sql_timing, sql_results = timed(
+            lambda attendees, players, max_time: sql_plan([user_id for user_id, _ in attendees], players, max_time),
+            cases)
+        api_timing, responses = timed(
+            lambda attendees, players, max_time: client.get('/api/plan', query_string={
+                'attendee': [name for _, name in attendees], 'players': players,
+                **({'max_time': max_time} if max_time else {})}),
+            cases)
+
+    if any(response.status_code != 200 for response in responses):
+        raise SystemExit('/api/plan did not answer with HTTP 200')
+    mismatches = sum(a != b for a, b in zip(index_results, sql_results))
+    print(f"{args.users} members, {args.games} games, {args.owned} owned each, {args.plans} attendee sets")
+    print(f"index build: {percentiles(builds)['p50_ms']} ms (median of {len(builds)})")
+    print(f"{'plan':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, result in (('index', index_timing), ('sql', sql_timing), ('/api/plan', api_timing)):
+        print(f"{name:<12} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} {result['max_ms']:>8}")
+    print(f"index and SQL disagree on {mismatches} of {len(cases)} plans")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
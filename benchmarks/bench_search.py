@@ -0,0 +1,103 @@
+# benchmarks/bench_search.py
+"""Measure type-ahead search latency on a large catalogue.
+
+Seeds a throwaway SQLite database with --games games named from a made-up
+vocabulary of --words words, and times app.search.search_games for every
+prefix of a set of queries, as typed one character at a time. It runs once with the FTS5 index and once
+with the LIKE fallback, after dropping the index. It also times the
+/api/search request as a whole.
+
+Usage: python benchmarks/bench_search.py [--games 50000] [--words 10000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_db_dir = tempfile.mkdtemp(prefix='bgc-bench-')
+os.environ['DATABASE_URI'] = f"sqlite:///{os.path.join(_db_dir, 'search.db')}"
+
+from sqlalchemy import insert, text  # noqa: E402
+from app import create_app, search  # noqa: E402
+from app.models import db, Game  # noqa: E402
+from bench_suite import percentiles  # noqa: E402
+
+SYLLABLES = ('ca', 'tan', 'ti', 'ket', 'ri', 'de', 'pan', 'dem', 'ic', 'le', 'ga', 'cy', 'car', 'cas', 'so', 'ne',
+             'a', 'zul', 'wing', 'span', 'ter', 'ra', 'form', 'mars', 'gloom', 'ha', 'ven', 'root', 'scy', 'the',
+             'spi', 'rit', 'is', 'land', 'brass', 'do', 'mi', 'nion', 'ag', 'ri', 'co', 'la', 'ev', 'er', 'dell',
+             'ark', 'no', 'va', 'bur', 'gun', 'dy', 'splen', 'dor', 'or', 'lé', 'ans', 'heat', 'lost', 'ru', 'ins')
+
+
+def vocabulary(size, rng):
+    """Made-up words, so that prefixes are about as selective as in a real catalogue."""
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize())
+    return sorted(words)
+
+
+def seed(games, words, rng):
+    db.drop_all()
+    db.create_all()
+    db.session.execute(insert(Game), [
+        {'bgg_id': i, 'name': ' '.join(rng.sample(words, rng.randint(1, 4))) + f' {i}', 'thumbnail': '',
+         'vote_count': rng.randint(0, 5)}
+        for i in range(games)
+    ])
+    db.session.commit()
+
+
+def typed_queries(count, words, rng):
+    """Every prefix of two characters or more of random one and two word queries."""
+    queries = []
+    while len(queries) < count:
+        phrase = ' '.join(rng.sample(words, rng.randint(1, 2))).lower()
+        queries += [phrase[:end] for end in range(search.MIN_QUERY_LENGTH, len(phrase) + 1)]
+    return queries[:count]
+
+
+def time_queries(queries, run):
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        run(query)
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=50000)
+    parser.add_argument('--words', type=int, default=10000, help='Distinct words in game names')
+    parser.add_argument('--queries', type=int, default=200, help='Queries per measurement')
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    app = create_app('cli')
+    client = create_app('web').test_client()
+    words = vocabulary(args.words, rng)
+    queries = typed_queries(args.queries, words, rng)
+    with app.app_context():
+        seed(args.games, words, rng)
+        results = {'fts5': time_queries(queries, search.search_games)}
+        results['fts5 /api/search'] = time_queries(queries, lambda query: client.get('/api/search', query_string={'q': query}))
+
+        for trigger in ('insert', 'update', 'delete'):
+            db.session.execute(text(f"DROP TRIGGER game_search_{trigger}"))
+        db.session.execute(text("DROP TABLE game_search"))
+        db.session.commit()
+        search._indexed_engines.clear()
+        results['like'] = time_queries(queries, search.search_games)
+
+    print(f"{args.games} games, {len(queries)} queries")
+    print(f"{'index':<18} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, result in results.items():
+        print(f"{name:<18} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} {result['max_ms']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# benchmarks/bench_startup.py
+"""Measure import time and cold start of the app for each create_app profile.
+
+Every sample runs in a fresh interpreter: it times 'import app', then
+create_app(profile), and reports the modules loaded and the threads running
+afterwards. It also times a complete 'admin_commands.py --help' run. Medians
+over --repeat runs are reported.
+
+Usage: python benchmarks/bench_startup.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = '''
+import json, sys, threading, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+instance = app.create_app(sys.argv[1])
+created = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_ms': (created - imported) * 1000,
+    'modules': len(sys.modules),
+    'threads': threading.active_count(),
+}))
+'''
+
+
+def run(args, cwd, env):
+    started = time.perf_counter()
+    result = subprocess.run(args, cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    return result.stdout, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters per measurement')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bgc-bench-')  # The web profile writes logs/ into the working directory
+    env = dict(os.environ, PYTHONPATH=ROOT, DATABASE_URI=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+               ADMIN_PASSWORD='benchmark')
+
+    print(f"{'profile':<10} {'import ms':>10} {'create ms':>10} {'process ms':>11} {'modules':>8} {'threads':>8}")
+    for profile in ('web', 'worker', 'cli'):
+        samples = []
+        for _ in range(args.repeat):
+            output, wall = run([sys.executable, '-c', PROBE, profile], workdir, env)
+            samples.append({**json.loads(output.strip().splitlines()[-1]), 'wall_ms': wall})
+        median = {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+        print(f"{profile:<10} {median['import_ms']:>10.1f} {median['create_ms']:>10.1f} {median['wall_ms']:>11.1f} "
+              f"{median['modules']:>8.0f} {median['threads']:>8.0f}")
+
+    walls = [run([sys.executable, os.path.join(ROOT, 'admin_commands.py'), '--help'], workdir, env)[1]
+             for _ in range(args.repeat)]
+    print(f"admin_commands.py --help: {statistics.median(walls):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
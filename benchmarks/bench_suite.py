@@ -0,0 +1,321 @@
+# benchmarks/bench_suite.py
+"""End-to-end benchmark suite for the BGG sync and the web pages.
+
+The sync scenarios run app.bgg.update_games_for_user and
+app.bgg.update_all_games against a local fake BGG server (see fake_bgg.py)
+that injects 202 and 429 replies. The page scenarios seed throwaway SQLite
+databases of each requested size and drive '/' (cold and warm render cache)
+and '/vote/<id>' through the Flask test client as a logged-in member.
+
+Every scenario reports throughput, latency percentiles, SQL statements and
+the tracemalloc peak. Results can be saved as a JSON baseline and later runs
+compared against it: statement counts may not grow, and timings, throughput
+and memory may not get worse by more than the tolerance.
+
+Usage:
+    python benchmarks/bench_suite.py [--users 50] [--games 5000] [--sizes 500 5000]
+    python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_suite.py --compare benchmarks/baseline.json [--tolerance 0.25]
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_db_dir = tempfile.mkdtemp(prefix='bgc-bench-')
+os.environ['DATABASE_URI'] = f"sqlite:///{os.path.join(_db_dir, 'bench.db')}"
+
+from sqlalchemy import event, insert, select  # noqa: E402
+from app import create_app, bgg  # noqa: E402
+from app.cache import bump_data_version  # noqa: E402
+from app.extensions import bgg_client  # noqa: E402
+from app.models import db, Game, User, user_games, votes  # noqa: E402
+from app.votes import recount_votes  # noqa: E402
+from fake_bgg import FakeBGG  # noqa: E402
+
+PASSWORD = 'benchmark'
+COUNT_METRICS = ('statements', 'commits', 'statements_per_request', 'bgg_requests')  # May never grow
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+        event.listen(engine, 'commit', self._on_commit)
+
+    def _on_execute(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+
+def percentiles(samples):
+    """Return p50/p95/p99 and max of latency samples (seconds) in milliseconds."""
+    ordered = sorted(samples)
+    cut = statistics.quantiles(ordered, n=100, method='inclusive') if len(ordered) > 1 else ordered * 99
+    return {
+        'p50_ms': round(cut[49] * 1000, 2),
+        'p95_ms': round(cut[94] * 1000, 2),
+        'p99_ms': round(cut[98] * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
+
+
+def reset_database():
+    db.drop_all()
+    db.create_all()
+
+
+def add_members(names):
+    """Insert members sharing one password hash, which is slow to compute on purpose."""
+    first = User(name=names[0], bgg_username=names[0])
+    first.set_password(PASSWORD)
+    db.session.add(first)
+    db.session.flush()
+    if names[1:]:
+        db.session.execute(insert(User), [
+            {'name': name, 'bgg_username': name, 'password_hash': first.password_hash} for name in names[1:]
+        ])
+    db.session.commit()
+
+
+def seed(games, users, owned=40, seed_value=1):
+    """Replace the database contents with a random club of the given size."""
+    rng = random.Random(seed_value)
+    reset_database()
+    add_members([f'member{i}' for i in range(users)])
+    db.session.execute(insert(Game), [
+        {'bgg_id': 1000 + i, 'name': f'Game {i}', 'thumbnail': '', 'min_players': rng.randint(1, 3),
+         'max_players': rng.randint(3, 8), 'playing_time': rng.choice((30, 45, 60, 90, 120))}
+        for i in range(games)
+    ])
+    db.session.execute(insert(user_games), [
+        {'user_id': user_id, 'game_id': game_id}
+        for user_id in range(1, users + 1)
+        for game_id in rng.sample(range(1, games + 1), min(games, owned))
+    ])
+    db.session.execute(insert(votes), [
+        {'user_id': user_id, 'game_id': game_id}
+        for user_id in range(2, users + 1)  # member0 keeps its votes free for the vote scenario
+        for game_id in rng.sample(range(1, games + 1), min(games, 3))
+    ])
+    db.session.commit()
+    recount_votes()
+    bump_data_version()
+
+
+def measure(counter, run):
+    """Run a callable under tracemalloc, returning (result, seconds, statements, commits, peak KiB)."""
+    counter.reset()
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = run()
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, counter.statements, counter.commits, peak // 1024
+
+
+def bgg_requests(fake):
+    return {
+        'bgg_requests': sum(fake.requests.values()),
+        'bgg_queued': sum(n for (_, status), n in fake.requests.items() if status == 202),
+        'bgg_rate_limited': sum(n for (_, status), n in fake.requests.items() if status == 429),
+    }
+
+
+def bench_sync_user(app, fake, counter, games):
+    """Sync one member with a fresh collection, then again with nothing changed."""
+    results = {}
+    with app.app_context():
+        reset_database()
+        add_members(['solo'])
+        fake.collections['solo'] = list(range(100000, 100000 + games))
+        for label in ('fresh', 'repeat'):
+            fake.reset()
+            user = User.query.filter_by(name='solo').one()
+            summary, elapsed, statements, commits, peak = measure(counter, lambda: bgg.update_games_for_user(user))
+            results[f'sync_user_{label}'] = {
+                'games': games, 'wall_ms': round(elapsed * 1000, 1),
+                'games_per_s': round(summary['games'] / elapsed, 1),
+                'statements': statements, 'commits': commits, 'peak_kb': peak, **bgg_requests(fake),
+            }
+        db.session.remove()
+    return results
+
+
+def bench_sync_all(app, fake, counter, users, games, owned, seed_value=1):
+    """Sync a whole club whose collections overlap within a shared catalogue."""
+    rng = random.Random(seed_value)
+    names = [f'member{i}' for i in range(users)]
+    catalogue = range(200000, 200000 + games)
+    for name in names:
+        fake.collections[name] = rng.sample(catalogue, min(games, owned))
+    with app.app_context():
+        reset_database()
+        add_members(names)
+        db.session.remove()
+
+    results = {}
+    for label in ('fresh', 'repeat'):
+        fake.reset()
+        summary, elapsed, statements, commits, peak = measure(counter, lambda: bgg.update_all_games(app))
+        if summary['failed']:
+            raise SystemExit(f"Sync failed for {sorted(summary['failed'])}")
+        results[f'sync_all_{label}'] = {
+            'users': users, 'games': games, 'wall_ms': round(elapsed * 1000, 1),
+            'users_per_s': round(len(summary['synced']) / elapsed, 2),
+            'games_per_s': round(summary['details']['fetched'] / elapsed, 1),
+            'statements': statements, 'commits': commits, 'peak_kb': peak, **bgg_requests(fake),
+        }
+    return results
+
+
+def timed_requests(client, counter, count, request, before=None):
+    """Issue count requests, returning latency samples and statements per request."""
+    samples = []
+    counter.reset()
+    tracemalloc.start()
+    try:
+        for i in range(count):
+            if before:
+                before(i)
+            started = time.perf_counter()
+            response = request(i)
+            samples.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                raise SystemExit(f"Request failed with HTTP {response.status_code}")
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'requests': count, 'requests_per_s': round(count / sum(samples), 1), **percentiles(samples),
+        'statements_per_request': round(counter.statements / count, 2), 'peak_kb': peak // 1024,
+    }
+
+
+def bench_pages(app, counter, size, users, count):
+    """Drive the index (cold and warm) and the vote route on a seeded database."""
+    with app.app_context():
+        seed(size, users)
+        game_ids = db.session.execute(select(Game.id).order_by(Game.vote_count.desc()).limit(20)).scalars().all()
+        db.session.remove()
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'member0', 'password': PASSWORD})
+    results = {
+        f'index_cold_{size}': timed_requests(client, counter, count, lambda i: client.get('/'),
+                                             before=lambda i: bump_data_version()),
+        f'index_warm_{size}': timed_requests(client, counter, count, lambda i: client.get('/')),
+    }
+    # Each pair of requests casts and then withdraws a vote, so the member never hits the cap
+    results[f'vote_{size}'] = timed_requests(
+        client, counter, count * 2, lambda i: client.post(f'/vote/{game_ids[(i // 2) % len(game_ids)]}')
+    )
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return human-readable regressions of results against a baseline."""
+    regressions = []
+    for scenario, metrics in baseline['results'].items():
+        for metric, expected in metrics.items():
+            actual = results.get(scenario, {}).get(metric)
+            if actual is None or not isinstance(expected, (int, float)) or metric.startswith(('bgg_queued', 'bgg_rate')):
+                continue
+            if metric in COUNT_METRICS:
+                worse = actual > expected
+            elif metric.endswith('_per_s'):
+                worse = actual < expected * (1 - tolerance)
+            elif metric.endswith(('_ms', '_kb')):
+                worse = actual > expected * (1 + tolerance)
+            else:
+                continue
+            if worse:
+                regressions.append(f"{scenario}.{metric}: {expected} -> {actual}")
+    return regressions
+
+
+def print_results(results):
+    for scenario, metrics in results.items():
+        print(f"{scenario}: " + ', '.join(f'{metric}={value}' for metric, value in metrics.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50, help='Members in the club-wide sync and page scenarios')
+    parser.add_argument('--games', type=int, default=5000, help='Catalogue size for the club-wide sync')
+    parser.add_argument('--owned', type=int, default=200, help='Games in each member collection')
+    parser.add_argument('--user-games', type=int, default=1000, help='Games in the single-member sync')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 5000], help='Catalogue sizes for the page scenarios')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per page scenario')
+    parser.add_argument('--rate-limit-every', type=int, default=10, help='Answer every Nth thing request with a 429 (0 disables)')
+    parser.add_argument('--only', choices=('sync', 'pages'), help='Run only the sync or the page scenarios')
+    parser.add_argument('--save-baseline', metavar='PATH', help='Write the results as a baseline')
+    parser.add_argument('--compare', metavar='PATH', help='Compare the results with a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown against the baseline')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)  # The injected 202s and 429s would otherwise flood the output
+    fake = FakeBGG(rate_limit_every=args.rate_limit_every).start()
+    bgg.BGG_COLLECTION_URL = f'{fake.url}/xmlapi2/collection'
+    bgg.BGG_THING_URL = f'{fake.url}/xmlapi2/thing'
+    bgg_client.rate_limiter.configure(rate=1000, burst=50)  # Measure our code, not BGG's politeness limit
+
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, THUMBNAIL_DIR=os.path.join(_db_dir, 'thumbnails'))
+    with app.app_context():
+        counter = StatementCounter(db.engine)
+
+    results = {}
+    try:
+        if args.only in (None, 'sync'):
+            results.update(bench_sync_user(app, fake, counter, args.user_games))
+            results.update(bench_sync_all(app, fake, counter, args.users, args.games, args.owned))
+        if args.only in (None, 'pages'):
+            for size in args.sizes:
+                results.update(bench_pages(app, counter, size, args.users, args.requests))
+    finally:
+        fake.stop()
+    print_results(results)
+
+    run = {
+        'python': platform.python_version(), 'platform': platform.platform(),
+        'args': {key: value for key, value in vars(args).items() if key not in ('save_baseline', 'compare', 'tolerance')},
+        'results': results,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(run, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved baseline to {args.save_baseline}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('args') != run['args']:
+            print("Warning: the baseline was recorded with different arguments.")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            sys.exit("Regressions against the baseline:\n  " + '\n  '.join(regressions))
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == '__main__':
+    main()
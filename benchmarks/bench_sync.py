@@ -0,0 +1,84 @@
+# benchmarks/bench_sync.py
+"""Benchmark the per-user game sync against a stubbed BGG API.
+
+Compares the original one-query-and-one-commit-per-game sync with the batched
+sync in app.bgg.update_games_for_user, reporting SQL statements, commits and
+wall time for a fresh collection and for a repeat run.
+
+Usage: python benchmarks/bench_sync.py [--games 600]
+"""
+import argparse
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_suite import StatementCounter  # noqa: E402  Sets up the throwaway database
+from fake_bgg import collection_xml, thing_xml  # noqa: E402
+from app import create_app, bgg  # noqa: E402
+from app.models import db, Game, User  # noqa: E402
+
+
+def legacy_update_games_for_user(user):
+    """The original sync loop: one lookup and one commit per game and per link."""
+    game_ids = bgg.fetch_user_games(user.bgg_username)
+    for i in range(0, len(game_ids), bgg.BATCH_SIZE):
+        batch_ids = game_ids[i:i + bgg.BATCH_SIZE]
+        root = ET.fromstring(bgg.fetch_game_details_batch(batch_ids))
+        for item in root.findall('item'):
+            bgg_id = item.attrib.get('id')
+            game = Game.query.filter_by(bgg_id=bgg_id).first()
+            if not game:
+                details = bgg.parse_game_details(item)
+                details.pop('tags')  # The original sync stored no tags
+                game = Game(bgg_id=bgg_id, **details)
+                db.session.add(game)
+                db.session.commit()
+            if game not in user.owned_games:
+                user.owned_games.append(game)
+                db.session.commit()
+
+
+def run(label, sync, user_name, counter):
+    user = User.query.filter_by(name=user_name).one()
+    counter.reset()
+    started = time.perf_counter()
+    sync(user)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {counter.statements:>10} {counter.commits:>8} {elapsed * 1000:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=600, help='Games in each stubbed collection')
+    args = parser.parse_args()
+
+    # Each user gets a disjoint collection so both implementations start from an empty catalogue
+    collections = {
+        name: collection_xml(range(offset, offset + args.games))
+        for name, offset in (('legacy', 100000), ('new', 200000))
+    }
+    bgg.fetch_user_games = lambda username: bgg.parse_bgg_collection(collections[username])
+    bgg.fetch_game_details_batch = lambda batch_ids: thing_xml([int(bgg_id) for bgg_id in batch_ids])
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        for name in ('legacy', 'new'):
+            user = User(name=name, bgg_username=name)
+            user.set_password(name)
+            db.session.add(user)
+        db.session.commit()
+
+        counter = StatementCounter(db.engine)
+        print(f"{'run':<28} {'statements':>10} {'commits':>8} {'wall ms':>10}")
+        run('legacy (fresh)', legacy_update_games_for_user, 'legacy', counter)
+        run('legacy (repeat)', legacy_update_games_for_user, 'legacy', counter)
+        run('batched (fresh)', bgg.update_games_for_user, 'new', counter)
+        run('batched (repeat)', bgg.update_games_for_user, 'new', counter)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/fake_bgg.py
+"""A local stand-in for the BGG XML API used by the benchmarks.
+
+Serves generated collection and thing XML plus a small thumbnail image, and
+can inject the replies that shape real syncs: a 202 ("request queued") for the
+first collection request of every member and a 429 for every Nth thing
+request. Both carry a short Retry-After so the client's retry paths run
+without slowing the benchmark down.
+"""
+import io
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+RETRY_AFTER = '0.05'  # Seconds; fractional so injected 202s and 429s cost almost nothing
+
+
+def collection_xml(bgg_ids):
+    items = ''.join(f'<item objecttype="thing" objectid="{i}" subtype="boardgame"/>' for i in bgg_ids)
+    return f'<items totalitems="{len(bgg_ids)}">{items}</items>'.encode()
+
+
+def thing_xml(bgg_ids, image_url=None):
+    items = ''.join(
+        f'<item type="boardgame" id="{i}">'
+        + (f'<thumbnail>{image_url}?id={i}</thumbnail>' if image_url else '')
+        + f'<name type="primary" sortindex="1" value="Game {i}"/>'
+        f'<name type="alternate" sortindex="1" value="Spiel {i}"/>'
+        f'<description>{"A game about trading and building. " * 20}</description>'
+        f'<minplayers value="{1 + i % 3}"/><maxplayers value="{3 + i % 5}"/>'
+        f'<playingtime value="{(1 + i % 8) * 15}"/>'
+        f'<link type="boardgamecategory" id="{1000 + i % 40}" value="Category {i % 40}"/>'
+        f'<link type="boardgamecategory" id="{1040 + i % 7}" value="Category {40 + i % 7}"/>'
+        f'<link type="boardgamemechanic" id="{2000 + i % 60}" value="Mechanic {i % 60}"/>'
+        f'<link type="boardgamemechanic" id="{2060 + i % 11}" value="Mechanic {60 + i % 11}"/>'
+        f'<link type="boardgamedesigner" id="{i % 500}" value="Designer {i % 500}"/>'
+        f'<link type="boardgamepublisher" id="{i % 90}" value="Publisher {i % 90}"/>'
+        f'<statistics page="1"><ratings><average value="7.1"/><averageweight value="{1 + i % 40 / 10}"/></ratings></statistics>'
+        f'</item>'
+        for i in bgg_ids
+    )
+    return f'<items>{items}</items>'.encode()
+
+
+def thumbnail_png():
+    if Image is None:
+        return b''
+    buffer = io.BytesIO()
+    Image.new('RGB', (200, 150), (120, 40, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # Clients dropping pooled keep-alive connections is expected
+
+
+class FakeBGG:
+    """Threaded HTTP server answering /xmlapi2/collection, /xmlapi2/thing and /images/.
+
+    collections maps BGG usernames to lists of game IDs. queue_collections
+    answers each member's first collection request with a 202, and
+    rate_limit_every answers every Nth thing request with a 429 (0 disables).
+    requests counts replies by (endpoint, status).
+    """
+
+    def __init__(self, collections=None, queue_collections=True, rate_limit_every=10):
+        self.collections = collections or {}
+        self.queue_collections = queue_collections
+        self.rate_limit_every = rate_limit_every
+        self.requests = Counter()
+        self.image = thumbnail_png()
+        self._queued = set()
+        self._thing_requests = 0
+        self._lock = threading.Lock()
+        self._server = QuietServer(('127.0.0.1', 0), self._handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self._server.server_port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-bgg', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self._queued.clear()
+            self._thing_requests = 0
+
+    def respond(self, path, query):
+        """Return (status, content type, body) for one request."""
+        endpoint = path.rsplit('/', 1)[-1]
+        if path == '/xmlapi2/collection':
+            username = query.get('username', [''])[0]
+            with self._lock:
+                queued = self.queue_collections and username not in self._queued
+                self._queued.add(username)
+            if queued:
+                return 202, 'text/xml', b'<message>Your request for this collection has been accepted</message>'
+            return 200, 'text/xml', collection_xml(self.collections.get(username, []))
+        if path == '/xmlapi2/thing':
+            with self._lock:
+                self._thing_requests += 1
+                throttled = self.rate_limit_every and self._thing_requests % self.rate_limit_every == 0
+            if throttled:
+                return 429, 'text/plain', b'Rate limit exceeded'
+            ids = [int(i) for i in query.get('id', [''])[0].split(',') if i]
+            return 200, 'text/xml', thing_xml(ids, f'{self.url}/images/thumbnail.png')
+        if path.startswith('/images/') and self.image:
+            return 200, 'image/png', self.image
+        return 404, 'text/plain', f'Unknown endpoint {endpoint}'.encode()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                status, content_type, body = fake.respond(parts.path, parse_qs(parts.query))
+                with fake._lock:
+                    fake.requests[(parts.path.rsplit('/', 1)[-1], status)] += 1
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                if status in (202, 429):
+                    self.send_header('Retry-After', RETRY_AFTER)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
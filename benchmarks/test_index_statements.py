@@ -0,0 +1,56 @@
+# benchmarks/test_index_statements.py
+"""The games index must be rendered from a fixed number of SQL statements.
+
+Run with: python -m pytest benchmarks
+"""
+import pytest
+from bench_suite import PASSWORD, StatementCounter, seed  # Imported first: it points the app at a scratch database
+from app import create_app
+from app.cache import bump_data_version
+from app.models import db
+
+# Statements for '/' as a logged-in member, whatever the catalogue size
+COLD_INDEX_STATEMENTS = 3  # The page of games, their voters and the member's own votes
+WARM_INDEX_STATEMENTS = 1  # The member's own votes; the grid comes from the render cache
+ATTEMPTS = 3  # Requests per measurement; the fewest statements count, see index_statements
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    return app
+
+
+def index_statements(app, size, cold):
+    """The fewest statements one of ATTEMPTS renders of '/' took on a seeded club.
+
+    Without Redis the member cache and the local data version expire every few
+    seconds, which can add a query to an unlucky request.
+    """
+    with app.app_context():
+        seed(size, users=30)
+        counter = StatementCounter(db.engine)
+        db.session.remove()
+    client = app.test_client()
+    client.post('/login', data={'username': 'member0', 'password': PASSWORD})
+    client.get('/')
+    counts = []
+    for _ in range(ATTEMPTS):
+        if cold:
+            bump_data_version()
+        counter.reset()
+        response = client.get('/')
+        assert response.status_code == 200
+        counts.append(counter.statements)
+    return min(counts)
+
+
+@pytest.mark.parametrize('size', [50, 500])
+def test_cold_index_statements(app, size):
+    assert index_statements(app, size, cold=True) == COLD_INDEX_STATEMENTS
+
+
+@pytest.mark.parametrize('size', [50, 500])
+def test_warm_index_statements(app, size):
+    assert index_statements(app, size, cold=False) == WARM_INDEX_STATEMENTS
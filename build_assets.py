@@ -0,0 +1,27 @@
+# build_assets.py
+"""Build fingerprinted, precompressed copies of the static files.
+
+    python build_assets.py
+
+Writes app/static/dist/ and its manifest (see app.assets). Run it on every
+deploy, before starting gunicorn: the app reads the manifest at startup and
+falls back to the plain static files when there is none.
+"""
+import logging
+import os
+from app import assets
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static')
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    manifest = assets.build(STATIC_FOLDER)
+    for name, target in sorted(manifest.items()):
+        logging.info(f"{name} -> {target}")
+    encodings = 'gzip and Brotli' if assets.brotli is not None else 'gzip (install Brotli for .br files)'
+    logging.info(f"Built {len(manifest)} assets with {encodings}")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,52 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')  # Use a strong secret key in production
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URI', 'sqlite:///board_game_club.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLite: write-ahead logging so readers are never blocked by the sync's writes (see app/database.py)
+    SQLITE_WAL = os.getenv('SQLITE_WAL', 'true').lower() in ('1', 'true', 'yes')
+    # Server databases (Postgres): connections kept per process, plus overflow under load
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+    if SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        # Seconds a connection waits for a lock before failing with "database is locked"
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+    else:
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': DB_POOL_SIZE,
+            'max_overflow': DB_MAX_OVERFLOW,
+            'pool_timeout': 10,
+            'pool_pre_ping': True,  # Replace connections the server or a proxy closed while idle
+            'pool_recycle': 1800,
+        }
     ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD')
+    # Run the BGG sync scheduler inside the web app. Leave off in production and
+    # run sync_worker.py as a single separate process instead.
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    SYNC_INTERVAL_HOURS = int(os.getenv('SYNC_INTERVAL_HOURS', 24))
+    # Number of members synced from BGG concurrently by the nightly job
+    BGG_SYNC_WORKERS = int(os.getenv('BGG_SYNC_WORKERS', 4))
+    # Timeouts in seconds for connecting to and reading from the BGG API
+    BGG_CONNECT_TIMEOUT = float(os.getenv('BGG_CONNECT_TIMEOUT', 10))
+    BGG_READ_TIMEOUT = float(os.getenv('BGG_READ_TIMEOUT', 60))
+    # Hours before stored game details are considered stale and fetched again (0: never)
+    BGG_DETAILS_TTL_HOURS = int(os.getenv('BGG_DETAILS_TTL_HOURS', 24 * 30))
+    # Delete games that no member owns or votes for any more after a sync
+    BGG_SYNC_DELETE_ORPHANS = os.getenv('BGG_SYNC_DELETE_ORPHANS', 'false').lower() in ('1', 'true', 'yes')
+    # Local thumbnail store; must be shared by the web app and the sync worker.
+    # Defaults to <instance path>/thumbnails.
+    THUMBNAIL_DIR = os.getenv('THUMBNAIL_DIR')
+    # Prometheus metrics at /metrics; scrapers must send 'Authorization: Bearer <METRICS_TOKEN>'
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    # werkzeug method for new password hashes, e.g. 'scrypt' or 'pbkdf2:sha256:1000000';
+    # existing hashes are upgraded when their member next logs in
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    # Seconds a web process reuses a logged-in member loaded from the database, as long as
+    # no member has been changed or deleted since; 0 disables
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 30))
+    # gzip/Brotli for pages and JSON; turn off when a proxy in front already compresses
+    COMPRESS_RESPONSES = os.getenv('COMPRESS_RESPONSES', 'true').lower() in ('1', 'true', 'yes')
+    # Shared by the render cache, sync lock and status, live vote events and the rate limiter
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
     # Flask-Limiter configuration
+    RATELIMIT_STORAGE_URI = REDIS_URL
     RATELIMIT_HEADERS_ENABLED = True
@@ -0,0 +1,32 @@
+# gunicorn.conf.py
+"""Gunicorn settings: gunicorn -c gunicorn.conf.py wsgi:app
+
+Threaded workers, because every open games page keeps one /events stream
+open: with the default sync workers each stream would tie up a whole
+process. Streams hold no database connection, so threads can comfortably
+outnumber the SQLAlchemy pool.
+
+The app is imported once in the master and forked into the workers, which
+then share its memory copy-on-write and boot without importing anything.
+create_app opens no connections and starts no threads, so nothing crosses
+the fork except the engine's pool, which post_fork discards. Leave
+SCHEDULER_ENABLED off here: its thread would only run in the master. Use
+sync_worker.py instead.
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 32))  # Concurrent requests, including open event streams, per worker
+# Event streams send a heartbeat every 15 seconds, well inside this
+timeout = 60
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Connections inherited from the master must not be shared with it or other workers
+    from app.extensions import db
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -19,5 +19,10 @@ pip install -r requirements.txt
 flask db init
 flask db migrate -m "Initial migration"
 flask db upgrade
+# Migrations do not create the game search index (see app/search.py)
+flask search-index
+
+# Build the fingerprinted, compressed static files
+python build_assets.py
 
 echo "Setup complete!"
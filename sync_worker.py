@@ -0,0 +1,67 @@
+# sync_worker.py
+"""Standalone BGG sync worker.
+
+Run exactly one of these per deployment, next to the web app:
+
+    python sync_worker.py          # sync every SYNC_INTERVAL_HOURS, starting now
+    python sync_worker.py --once   # run a single sync and exit
+    python sync_worker.py --metrics-port 9101   # also serve /metrics (needs METRICS_ENABLED)
+
+Web workers leave scheduling to this process (SCHEDULER_ENABLED=false), and the
+Redis lock taken by run_sync keeps a second worker or an admin-triggered sync
+from overlapping with it.
+"""
+import argparse
+import logging
+import threading
+from datetime import datetime
+from wsgiref.simple_server import WSGIRequestHandler, make_server
+from apscheduler.schedulers.blocking import BlockingScheduler
+from app import create_app, metrics
+from app.sync import run_sync
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would drown out the sync log
+
+
+def serve_metrics(port, token):
+    """Serve this process's metrics on a background thread."""
+    server = make_server('', port, metrics.wsgi_app(token), handler_class=QuietHandler)
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    logging.info(f"Serving sync metrics on port {port}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync club collections from BoardGameGeek.")
+    parser.add_argument('--once', action='store_true', help="Run a single sync and exit")
+    parser.add_argument('--metrics-port', type=int, help="Serve Prometheus metrics on this port")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    app = create_app('worker')
+    if args.metrics_port:
+        if metrics.enabled:
+            serve_metrics(args.metrics_port, app.config.get('METRICS_TOKEN'))
+        else:
+            logging.warning("--metrics-port ignored: METRICS_ENABLED is not set.")
+
+    if args.once:
+        run_sync(app)
+        return
+
+    scheduler = BlockingScheduler()
+    scheduler.add_job(
+        func=run_sync, args=[app], trigger="interval", hours=app.config['SYNC_INTERVAL_HOURS'],
+        next_run_time=datetime.now(), max_instances=1, coalesce=True
+    )
+    logging.info(f"Sync worker started: syncing every {app.config['SYNC_INTERVAL_HOURS']} hours.")
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        logging.info("Sync worker stopped.")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 from app import create_app
 
-app = create_app()
+app = create_app('web')
 
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=8000)  # Adjust port as needed